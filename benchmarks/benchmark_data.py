@@ -0,0 +1,35 @@
+import featuretools as ft
+import numpy as np
+import pandas as pd
+from featuretools.variable_types import Categorical, Numeric
+
+
+def make_benchmark_data(n_rows, cardinality, n_columns, seed=0):
+    """Builds a synthetic entityset with n_columns categorical columns of the given
+    cardinality and one numeric 'value' column used as the target. Category
+    frequencies follow a Zipf-like distribution, so the most frequent categories
+    dominate like they do in real data, and about 1% of the values are missing.
+    returns (entityset, features, feature_matrix, target)
+    """
+    rng = np.random.RandomState(seed)
+    weights = 1.0 / np.arange(1, cardinality + 1)
+    weights /= weights.sum()
+    data = {'id': np.arange(n_rows)}
+    variable_types = {}
+    for i in range(n_columns):
+        name = 'category_%d' % i
+        labels = np.array(['%s_%d' % (name, c) for c in range(cardinality)], dtype=object)
+        values = labels[rng.choice(cardinality, size=n_rows, p=weights)]
+        values[rng.rand(n_rows) < 0.01] = np.nan
+        data[name] = values
+        variable_types[name] = Categorical
+    data['value'] = rng.rand(n_rows)
+    variable_types['value'] = Numeric
+    df = pd.DataFrame(data)
+
+    es = ft.EntitySet('benchmark')
+    es.entity_from_dataframe(entity_id='data', dataframe=df, index='id', variable_types=variable_types)
+    features = [ft.Feature(es['data'][name]) for name in df.columns if name != 'id']
+    # identity features calculate to the columns themselves, indexed by id
+    feature_matrix = df.set_index('id')[[f.get_name() for f in features]]
+    return es, features, feature_matrix, feature_matrix['value']
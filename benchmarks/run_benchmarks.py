@@ -0,0 +1,186 @@
+"""Benchmarks fit, transform and primitive calculation time and peak memory of
+every encoder method on synthetic data, and compares results against a baseline.
+
+    python benchmarks/run_benchmarks.py --rows 1000 100000 --cardinality 10 10000 --output results.json
+    python benchmarks/run_benchmarks.py --output new.json --compare results.json
+    python benchmarks/run_benchmarks.py --methods one_hot --rows 10000 100000 --top-n 5 50 500 --cardinality 1000
+"""
+import argparse
+import gc
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+import category_encoders
+import featuretools as ft
+import numpy as np
+import pandas as pd
+
+from benchmark_data import make_benchmark_data
+
+import categorical_encoding
+from categorical_encoding.encoders import Encoder
+from categorical_encoding.encoders.encoder_methods import OneHotEncoder
+
+METHODS = ['ordinal', 'binary', 'one_hot', 'hashing', 'target', 'leave_one_out']
+ENGINES = ['category_encoders', 'native']
+STAGES = ['fit', 'transform', 'primitives']
+KEYS = ['method', 'engine', 'rows', 'cardinality', 'columns', 'top_n', 'stage']
+
+
+def measure(func, repeat):
+    """Times func repeat times, then runs it once more under tracemalloc for its
+    peak allocation, so tracing does not slow down the timed runs.
+    returns (best seconds, all timings, peak bytes)
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), timings, peak
+
+
+def benchmark_case(method, engine, data, stages, repeat, top_n=None):
+    """Benchmarks the stages of one encoder method on one dataset. top_n is passed
+    to one_hot, None keeps its default.
+    returns a result dict per stage
+    """
+    es, features, feature_matrix, y = data
+    encoded = [f.get_name() for f in features if f.get_name() != 'value']
+
+    def make_encoder():
+        if top_n is not None:
+            return Encoder(method=OneHotEncoder(cols=encoded, top_n=top_n, engine=engine))
+        return Encoder(method=method, to_encode=encoded, engine=engine)
+
+    def fit():
+        return make_encoder().fit(feature_matrix, features, y)
+
+    fitted = fit()
+    stage_functions = {'fit': fit,
+                       'transform': lambda: fitted.transform(feature_matrix),
+                       'primitives': lambda: ft.calculate_feature_matrix(fitted.get_features(), es)}
+    results = []
+    for stage in stages:
+        seconds, timings, peak = measure(stage_functions[stage], repeat)
+        results.append({'stage': stage, 'seconds': seconds, 'timings': timings, 'peak_bytes': peak})
+    return results
+
+
+def run(args):
+    """Runs every combination of the swept parameters.
+    returns results document (dict)
+    """
+    results = []
+    cases = []
+    for method, engine in itertools.product(args.methods, args.engines):
+        if method == 'hashing' and engine != ENGINES[0]:
+            print("skipping hashing with engine %s: hashing has a single implementation, benchmarked "
+                  "with engine %s" % (engine, ENGINES[0]), file=sys.stderr)
+            continue
+        cases.append((method, engine))
+    for rows, cardinality, columns in itertools.product(args.rows, args.cardinality, args.columns):
+        data = make_benchmark_data(rows, cardinality, columns, seed=args.seed)
+        for method, engine in cases:
+            # top_n only applies to one_hot, the other methods run once
+            for top_n in (args.top_n or [None]) if method == 'one_hot' else [None]:
+                case = {'method': method, 'engine': engine, 'rows': rows, 'cardinality': cardinality,
+                        'columns': columns, 'top_n': top_n}
+                for result in benchmark_case(method, engine, data, args.stages, args.repeat, top_n):
+                    result.update(case)
+                    results.append(result)
+                    print("%(method)s %(engine)s rows=%(rows)d cardinality=%(cardinality)d columns=%(columns)d "
+                          "top_n=%(top_n)s %(stage)s: %(seconds).4fs, peak %(peak_bytes)d bytes" % result)
+    metadata = {'created': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'repeat': args.repeat,
+                'seed': args.seed,
+                'versions': {'categorical_encoding': categorical_encoding.__version__,
+                             'featuretools': ft.__version__,
+                             'category_encoders': category_encoders.__version__,
+                             'pandas': pd.__version__,
+                             'numpy': np.__version__}}
+    return {'metadata': metadata, 'results': results}
+
+
+def compare(results, baseline, threshold):
+    """Prints the time and peak memory ratio of every result found in the baseline.
+    returns the keys of results slower than the baseline by more than threshold
+    """
+    def key(result):
+        # results saved before the top_n sweep have no top_n
+        return tuple(result.get(k) for k in KEYS)
+
+    previous = {key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        time_ratio = result['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+        memory_ratio = result['peak_bytes'] / old['peak_bytes'] if old['peak_bytes'] else float('inf')
+        flag = ''
+        if time_ratio > 1 + threshold:
+            regressions.append(key(result))
+            flag = '  REGRESSION'
+        name = ' '.join(str(k) for k in key(result))
+        print("%s: time x%.2f, peak memory x%.2f%s" % (name, time_ratio, memory_ratio, flag))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--cardinality', type=int, nargs='+', default=[10, 1000])
+    parser.add_argument('--columns', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--top-n', type=int, nargs='+',
+                        help='top_n values swept for one_hot, defaults to the OneHotEncoder default')
+    parser.add_argument('--methods', nargs='+', choices=METHODS, default=METHODS)
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=ENGINES)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage, the fastest is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='path of the JSON results file')
+    parser.add_argument('--compare', help='path of a baseline JSON results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown reported as a regression, defaults to 0.1 (10%%)')
+    args = parser.parse_args(argv)
+    if 'hashing' in args.methods and ENGINES[0] not in args.engines:
+        parser.error("hashing only runs with engine %s, add it to --engines" % ENGINES[0])
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with warnings.catch_warnings():
+        # category_encoders and featuretools warn about pandas deprecations on every call
+        warnings.simplefilter('ignore')
+        results = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
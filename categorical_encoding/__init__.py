@@ -4,5 +4,6 @@ from .encoders import Encoder
 import categorical_encoding.encoders
 import categorical_encoding.primitives
 import categorical_encoding.tests
+import categorical_encoding.utils
 
 __version__ = '0.4.1'
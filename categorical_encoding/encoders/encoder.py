@@ -1,76 +1,336 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
 from .encoder_methods import (
     BinaryEncoder,
     HashingEncoder,
     LeaveOneOutEncoder,
+    LoadedEncoder,
     OneHotEncoder,
     OrdinalEncoder,
-    TargetEncoder
+    TargetEncoder,
+    save_encoder
+)
+
+from categorical_encoding.primitives import (
+    BatchEnc,
+    BinaryEnc,
+    HashingEnc,
+    LeaveOneOutEnc,
+    OneHotEnc,
+    OrdinalEnc,
+    TargetEnc
+)
+from categorical_encoding.utils import (
+    Profiler,
+    encoded_feature,
+    profile_operation
 )
 
+ENCODING_PRIMITIVES = (OrdinalEnc, BinaryEnc, HashingEnc, OneHotEnc, TargetEnc, LeaveOneOutEnc)
+
 
 class Encoder():
     """
         Encodes specified columns of categorical values.
 
         Parameters:
-        cols: [str]
+        method: str or encoder
+            name of the encoding method or an encoder method instance.
+        to_encode: [str]
             list of column names to encode.
+        output: str
+            'dataframe' (default) or 'sparse'. Sparse output returns a scipy.sparse
+            CSR matrix from transform and is only supported by the one_hot method.
+            Only applies when method is given by name.
+        dtype: str or numpy dtype
+            dtype of the encoded columns, e.g. 'uint8' or 'float32'. 'auto' chooses the
+            smallest integer type (or float32) per column. Ordinal needs a signed integer or float
+            dtype, target and leave_one_out a float dtype. Only applies when method is given by name.
+        n_jobs: int
+            number of threads for per-column fit and transform work. -1 uses all CPUs.
+            Results are merged back in the original column order. Only applies when method is given by name.
+        engine: str
+            'category_encoders' (default) or 'native'. The native engine encodes with lookup
+            tables of NumPy arrays instead of category_encoders and gives the same output.
+            Hashing always uses its own implementation. Only applies when method is given by name.
+        min_frequency: int or float
+            groups categories seen fewer times than this (a count, or a fraction of the rows if
+            below 1) into one 'other' category at fit time, shrinking mappings and outputs.
+            In columns with rare categories, values not seen during fitting are encoded as
+            'other' too; columns without any encode them as unknown values. One-hot leaves rare
+            values without an indicator. Not supported by hashing. Only applies when method is given by name.
+        max_categories: int
+            keeps at most this many of the most frequent categories per column and groups the rest
+            like min_frequency. Only applies when method is given by name.
+        sketch_error: float
+            finds the top one-hot labels with bounded-memory Space-Saving sketches, which
+            overestimate counts by at most sketch_error times the number of rows, instead of
+            counting every value. fit and partial_fit both count in the sketches. Only supported by one_hot. Only applies when method is given by name.
+        cv: int
+            makes fit_transform encode the training rows out of fold, with the target statistics
+            of the other of cv contiguous folds, so no row sees its own target. Only supported
+            by target. Only applies when method is given by name.
+        multi_class: bool
+            treats the target as class labels and encodes every column into one column per
+            class (target, leave_one_out with engine='native'). Only applies when method is given by name.
+        smoothing: float
+            slope of the weighting between a category's target mean and the prior. Larger values
+            blend in more of the prior. Only supported by target, which defaults to 1.0.
+            Only applies when method is given by name.
+        min_samples_leaf: int
+            count at which a category's target mean and the prior are weighted equally. Only
+            supported by target, which defaults to 1. Only applies when method is given by name.
+        prior_weight: float
+            weight of the prior in the leave-one-out means, counted like that many more rows with
+            the prior as target. Only supported by leave_one_out with engine='native', which
+            defaults to 0. Only applies when method is given by name.
 
         Functions:
         fit:
             fits encoder to data table
             returns self
+        partial_fit:
+            updates the fitted encoder with a chunk of the data table (ordinal, target, leave_one_out, one_hot only)
+            returns self
         transform:
             encodes matrix and updates features accordingly
+            with chunksize, encodes the matrix chunksize rows at a time
+            with copy=False, columns that are not encoded share memory with the input
             returns encoded matrix (dataframe)
+        transform_iter:
+            encodes an iterable of matrices, e.g. from pd.read_csv(chunksize=...)
+            yields encoded matrices with identical columns and dtypes, those of the first matrix
+        transform_record:
+            encodes a single record given as a dict of column name to value, using plain dict lookup tables
+            the first call after fit or strip builds the tables, which takes about as long as transforming
+            one row per category; call build_record_tables first to keep the latency of every record flat
+            returns encoded values in the order of get_features() (list)
+        build_record_tables:
+            builds the lookup tables of transform_record ahead of the first record
+            returns self
+        transform_records:
+            encodes a list of records
+            returns encoded values with one row per record (numpy array)
         fit_transform:
             first fits, then transforms matrix
+            with cv (target only), the training rows are encoded out of fold
             returns encoded matrix (dataframe)
+        save:
+            saves the fitted encoder to a directory as JSON metadata and .npy lookup tables
+        load:
+            loads an encoder saved with save; the lookup tables are memory-mapped by default
+            returns Encoder that can transform, but not be refitted
+        profile:
+            records per-stage and per-column timings, row counts and, with memory=True,
+            allocated bytes of the encoding work done inside a with block in the same thread
+            calls of other encoders are left out, encoding primitives computed by featuretools are kept
+            profile blocks of several encoders can be nested
+            callback is called with every record as it is made
+            returns Profiler
+        stats:
+            summarizes the records of the last profile per operation, stage and column
+            returns dataframe
+        memory_usage:
+            estimates the memory held by the fitted encoder, with deep=True following object values
+            returns bytes per encoded column and internal structure (pd.Series)
+        strip:
+            drops state only kept to continue fitting (partial_fit) or for inspection (keep_matrix)
+            the encoder can still transform, transform records and be saved
+            returns self
+        get_features:
+            gets the encoded features, one encoding primitive per encoded column
+            with batch=True, all encoded columns share one BatchEnc feature placed at the first
+            encoded column, so featuretools computes them in a single call
+            returns features ([featuretools.Feature])
         get_mapping:
-            gets the mapping for the encoder (binary, ordinal only)
+            gets the mapping of an encoded column, by name or position (ordinal, binary, one_hot, target, leave_one_out)
+        get_mappings:
+            gets the mappings of all encoded columns (ordinal, binary, one_hot, target, leave_one_out)
+            returns dict of column name to mapping
+        get_grouping:
+            gets the grouping of rare categories of an encoded column by name or position, or None if it
+            had no rare categories (ordinal, binary, target, leave_one_out)
         get_hash_method:
             gets the hash_method of the encoder (hashing only)
             return hash_method (str)
         get_n_components:
             gets the number of columns used in the encoder (hashing only)
             returns n_components (int)
+        get_dtype:
+            gets the dtype option of the encoded columns
+        get_prior_weight:
+            gets the prior_weight of the encoder (leave_one_out only)
+            returns prior_weight (float)
     """
 
-    def __init__(self, method='one_hot', to_encode=None):
-        encoder_list = {'ordinal': OrdinalEncoder(cols=to_encode),
-                        'binary': BinaryEncoder(cols=to_encode),
-                        'hashing': HashingEncoder(cols=to_encode),
-                        'one_hot': OneHotEncoder(cols=to_encode),
-                        'target': TargetEncoder(cols=to_encode),
-                        'leave_one_out': LeaveOneOutEncoder(cols=to_encode)}
+    def __init__(self, method='one_hot', to_encode=None, output='dataframe', dtype=None, n_jobs=None,
+                 engine='category_encoders', min_frequency=None, max_categories=None, sketch_error=None,
+                 cv=None, multi_class=False, smoothing=None, min_samples_leaf=None, prior_weight=None):
+        if output != 'dataframe' and isinstance(method, str) and method != 'one_hot':
+            raise ValueError("'%s' output is only supported by the one_hot encoder method" % output)
+        if (min_frequency is not None or max_categories is not None) and method == 'hashing':
+            raise ValueError("min_frequency and max_categories are not supported by the hashing encoder method, "
+                             "which keeps no categories")
+        # an encoder instance is built with its own options, so these are only checked for method names
+        if isinstance(method, str):
+            if sketch_error is not None and method != 'one_hot':
+                raise ValueError("sketch_error is only supported by the one_hot encoder method")
+            if cv is not None and method != 'target':
+                raise ValueError("cv is only supported by the target encoder method")
+            if multi_class and method not in ('target', 'leave_one_out'):
+                raise ValueError("multi_class is only supported by the target and leave_one_out encoder methods")
+            if (smoothing is not None or min_samples_leaf is not None) and method != 'target':
+                raise ValueError("smoothing and min_samples_leaf are only supported by the target encoder method")
+            if prior_weight is not None and method != 'leave_one_out':
+                raise ValueError("prior_weight is only supported by the leave_one_out encoder method")
+        grouping = {'min_frequency': min_frequency, 'max_categories': max_categories}
+        # options left as None keep the defaults of the encoder method
+        weighting = {name: value for name, value in [('smoothing', smoothing), ('min_samples_leaf', min_samples_leaf),
+                                                     ('prior_weight', prior_weight)] if value is not None}
+        # only the chosen method is built, as each one validates the options it takes
+        encoder_list = {'ordinal': lambda: OrdinalEncoder(cols=to_encode, dtype=dtype, n_jobs=n_jobs, engine=engine,
+                                                          **grouping),
+                        'binary': lambda: BinaryEncoder(cols=to_encode, dtype=dtype, n_jobs=n_jobs, engine=engine,
+                                                        **grouping),
+                        'hashing': lambda: HashingEncoder(cols=to_encode, dtype=dtype, n_jobs=n_jobs),
+                        'one_hot': lambda: OneHotEncoder(cols=to_encode, output=output, dtype=dtype, n_jobs=n_jobs,
+                                                         engine=engine, sketch_error=sketch_error, **grouping),
+                        'target': lambda: TargetEncoder(cols=to_encode, dtype=dtype, n_jobs=n_jobs, engine=engine,
+                                                        cv=cv, multi_class=multi_class, **grouping, **weighting),
+                        'leave_one_out': lambda: LeaveOneOutEncoder(cols=to_encode, dtype=dtype, n_jobs=n_jobs,
+                                                                    engine=engine, multi_class=multi_class,
+                                                                    **grouping, **weighting)}
         if method in encoder_list:
-            method = encoder_list[method]
+            method = encoder_list[method]()
         elif isinstance(method, str):
             raise ValueError("'%s' is not a supported encoder. The list of supported String encoder method names is: %s" % (method, encoder_list.keys()))
 
         self.method = method
+        self.profiler = None
 
     def fit(self, X, features, y=None):
-        self.method.fit(X, features, y)
+        with profile_operation('fit', len(X), self):
+            self.method.fit(X, features, y)
+        return self
+
+    def partial_fit(self, X, features, y=None):
+        if not isinstance(self.method, (OrdinalEncoder, TargetEncoder, LeaveOneOutEncoder, OneHotEncoder)):
+            raise TypeError("Must be OrdinalEncoder, TargetEncoder, LeaveOneOutEncoder or OneHotEncoder")
+        with profile_operation('partial_fit', len(X), self):
+            self.method.partial_fit(X, features, y)
+        return self
+
+    def transform(self, X, chunksize=None, copy=True):
+        with profile_operation('transform', len(X), self):
+            if chunksize is None or len(X) <= chunksize:
+                return self.method.transform(X, copy=copy)
+            chunks = (X.iloc[start:start + chunksize] for start in range(0, len(X), chunksize))
+            encoded = [self.method.transform(chunk, copy=copy) for chunk in chunks]
+            if sparse.issparse(encoded[0]):
+                return sparse.vstack(encoded, format='csr')
+            return pd.concat(encoded)
+
+    def transform_iter(self, chunks, copy=True):
+        dtypes = None
+        for chunk in chunks:
+            with profile_operation('transform', len(chunk), self):
+                encoded = self.method.transform(chunk, copy=copy)
+                # later chunks are cast to the dtypes of the first, since without a dtype option
+                # category_encoders gives float ordinal codes only to chunks holding unseen values
+                if sparse.issparse(encoded):
+                    dtypes = encoded.dtype if dtypes is None else dtypes
+                    encoded = encoded.astype(dtypes, copy=False)
+                elif dtypes is None:
+                    dtypes = encoded.dtypes
+                else:
+                    for col in encoded.columns[encoded.dtypes.values != dtypes.values]:
+                        encoded[col] = encoded[col].astype(dtypes[col])
+            yield encoded
+
+    def transform_record(self, record):
+        return self.method.transform_record(record)
+
+    def build_record_tables(self):
+        self.method.build_record_tables()
         return self
 
-    def transform(self, X):
-        return self.method.transform(X)
+    def transform_records(self, records):
+        with profile_operation('transform_records', len(records), self):
+            return np.array([self.method.transform_record(record) for record in records])
 
     def fit_transform(self, X, features, y=None):
-        return self.method.fit_transform(X, features, y)
+        with profile_operation('fit_transform', len(X), self):
+            return self.method.fit_transform(X, features, y)
+
+    def profile(self, callback=None, memory=False):
+        self.profiler = Profiler(callback=callback, memory=memory, owner=self)
+        return self.profiler
+
+    def stats(self):
+        if getattr(self, 'profiler', None) is None:
+            raise ValueError("Nothing was profiled. Use the encoder inside `with encoder.profile():` first.")
+        return self.profiler.stats()
 
-    def get_features(self):
-        return self.method.get_features()
+    def save(self, path):
+        save_encoder(self.method, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        return cls(method=LoadedEncoder(path, mmap_mode=mmap_mode))
+
+    def memory_usage(self, deep=True):
+        return self.method.memory_usage(deep)
+
+    def strip(self):
+        self.method.strip()
+        return self
+
+    def get_features(self, batch=False):
+        features = self.method.get_features()
+        if not batch:
+            return features
+        encoded = {f.base_features[0].get_name() for f in features if isinstance(f.primitive, ENCODING_PRIMITIVES)}
+        # base features of the encoded columns in input order; one-hot has several features per column
+        bases = {}
+        batched = []
+        for f in features:
+            base = f.base_features[0] if f.base_features else None
+            if base is None or base.get_name() not in encoded:
+                batched.append(f)
+                continue
+            if not bases:
+                # the batch feature takes the place of the first encoded column
+                batched.append(None)
+            bases.setdefault(base.get_name(), base)
+        if not bases:
+            return features
+        feature = encoded_feature(list(bases.values()), BatchEnc(self.method, list(bases)))
+        return [feature if f is None else f for f in batched]
 
     def get_mapping(self, category=0):
         return self.method.get_mapping(category)
 
+    def get_mappings(self):
+        return self.method.get_mappings()
+
+    def get_grouping(self, category=0):
+        return self.method.get_grouping(category)
+
     def get_hash_method(self):
         if not isinstance(self.method, HashingEncoder):
             raise TypeError("Must be HashingEncoder")
         return self.method.hash_method
 
+    def get_dtype(self):
+        return self.method.get_dtype()
+
+    def get_prior_weight(self):
+        if not isinstance(self.method, LeaveOneOutEncoder):
+            raise TypeError("Must be LeaveOneOutEncoder")
+        return self.method.get_prior_weight()
+
     def get_n_components(self):
         if not isinstance(self.method, HashingEncoder):
             raise TypeError("Must be HashingEncoder")
@@ -2,6 +2,7 @@
 from .binary_encoder import BinaryEncoder
 from .hashing_encoder import HashingEncoder
 from .leave_one_out_encoder import LeaveOneOutEncoder
+from .loaded_encoder import LoadedEncoder, save_encoder
 from .one_hot_encoder import OneHotEncoder
 from .ordinal_encoder import OrdinalEncoder
 from .target_encoder import TargetEncoder
@@ -0,0 +1,44 @@
+from categorical_encoding.utils import encode_record, profile_stage
+
+
+class LookupTablesMixin():
+    """Gives an encoder method the per-category output tables used by BatchEnc and
+    save, and the dict lookup tables of transform_record. Both are built from the
+    fitted state on first use, or ahead of time with build_record_tables, and are
+    dropped by setting _output_tables and _record_tables to None when fitting or stripping.
+
+    Classes implement _build_output_tables, returning a dict of column name to LookupTable.
+    """
+
+    @property
+    def output_tables(self):
+        """Gets the lookup tables with the outputs of every encoded column, building
+        them on first use.
+        returns dict of column name to LookupTable
+        """
+        if self._output_tables is None:
+            with profile_stage('output_tables'):
+                self._output_tables = self._build_output_tables()
+        return self._output_tables
+
+    def _build_record_tables(self):
+        return {col: table.record_table() for col, table in self.output_tables.items()}
+
+    def build_record_tables(self):
+        """Builds the lookup tables of transform_record ahead of the first record, which
+        otherwise pays for building them. They are rebuilt after a fit or strip.
+        returns self
+        """
+        if self._record_tables is None:
+            with profile_stage('record_tables'):
+                self._record_tables = self._build_record_tables()
+        return self
+
+    def transform_record(self, record):
+        """Encodes a single record, a dict of column name to value, with plain dict
+        lookups. The first call builds the lookup tables unless build_record_tables did.
+        returns encoded values in the order of the output columns (list)
+        """
+        if self._record_tables is None:
+            self.build_record_tables()
+        return encode_record(record, self.input_columns, self._record_tables)
@@ -1,41 +1,150 @@
 import featuretools as ft
+import numpy as np
+import pandas as pd
 from category_encoders import BinaryEncoder as Binary
+from category_encoders.utils import convert_cols_to_list, get_obj_cols
 
+from categorical_encoding.encoders.encoder_methods.base import (
+    LookupTablesMixin
+)
 from categorical_encoding.primitives import BinaryEnc
+from categorical_encoding.utils import (
+    LookupTable,
+    MappingIndex,
+    category_frame,
+    check_engine,
+    check_grouping,
+    downcast_columns,
+    encoded_feature_names,
+    feature_names,
+    fit_groupings,
+    group_columns,
+    map_columns,
+    mapping_categories,
+    mapping_structures,
+    merge_categories,
+    missing_as_nan_columns,
+    ordinal_mapping,
+    output_tables,
+    profile_stage,
+    replace_columns,
+    structure_memory_usage,
+    table_structures
+)
 
 
-class BinaryEncoder():
+class BinaryEncoder(LookupTablesMixin):
     """Maps each categorical value to several columns using binary encoding.
 
     Parameters:
         cols: [str]
             list of column names to encode.
+        dtype: str or numpy dtype
+            dtype of the encoded columns. 'auto' chooses the smallest type per column.
+            defaults to None, which keeps the default (int64 or float64) output.
+        n_jobs: int
+            number of threads used for per-column work. -1 uses all CPUs.
+            defaults to None, which processes columns sequentially.
+        engine: str
+            'category_encoders' (default) fits and transforms through category_encoders.
+            'native' uses lookup tables of NumPy arrays built from the fitted categories.
+        min_frequency: int or float
+            categories seen fewer times than this (a count, or a fraction of the rows
+            if below 1) are grouped into one 'other' category at fit time. In columns
+            with rare categories, values not seen during fitting are encoded as 'other'
+            too; columns without any encode them as unknown values. defaults to None.
+        max_categories: int
+            keeps at most this many of the most frequent categories and groups the
+            rest like min_frequency. defaults to None.
     """
     name = 'binary'
 
-    def __init__(self, cols=None):
+    def __init__(self, cols=None, dtype=None, n_jobs=None, engine='category_encoders', min_frequency=None,
+                 max_categories=None):
+        check_engine(engine)
+        check_grouping(min_frequency, max_categories)
         self.encoder = Binary(cols=cols)
+        self.dtype = dtype
+        self.n_jobs = n_jobs
+        self.engine = engine
+        self.min_frequency = min_frequency
+        self.max_categories = max_categories
+        self.groupings = {}
 
     def fit(self, X, features, y=None):
         """Fits encoder to data table.
         returns self.
         """
-        self.encoder.fit(X, y)
-        self.features = self.encode_features_list(X, features)
+        cols = self.encoder.cols
+        self.cols = convert_cols_to_list(cols) if cols is not None else get_obj_cols(X)
+        self.groupings = fit_groupings(X, self.cols, self.min_frequency, self.max_categories)
+        X = group_columns(X, self.groupings)
+        categories = map_columns(lambda col: merge_categories(None, X[col]), self.cols, self.n_jobs,
+                                 stage='categories', rows=len(X))
+        self.categories = dict(zip(self.cols, categories))
+        if self.engine == 'native':
+            with profile_stage('lookup_tables', rows=len(X)):
+                self.tables = {col: self._lookup_table(categories) for col, categories in self.categories.items()}
+        else:
+            with profile_stage('category_encoders', rows=len(X)):
+                # fitting on the categories learns the same mapping, with missing values as one NaN category
+                self.encoder.fit(category_frame(self.categories), y=None)
+        with profile_stage('mapping_index', rows=len(X)):
+            self.mapping_index = self._mapping_index()
+        with profile_stage('encode_features_list', rows=len(X)):
+            self.features = self.encode_features_list(X, features)
+        with profile_stage('feature_names', rows=len(X)):
+            # output names are resolved once per fit, transform only reuses them
+            self.feature_names = feature_names(self.features)
+            self.encoded_names = encoded_feature_names(self.features, BinaryEnc)
+        self.input_columns = list(X.columns)
+        self._output_tables = None
+        self._record_tables = None
         return self
 
-    def transform(self, X):
+    @staticmethod
+    def _bits(n_categories):
+        """Writes the codes 1..n_categories in binary, most significant bit first,
+        with as many digits as category_encoders uses.
+        returns np.ndarray of shape (n_categories, digits)
+        """
+        digits = int(np.ceil(np.log2(n_categories))) + 1 if n_categories else 1
+        codes = np.arange(1, n_categories + 1)
+        return (codes[:, None] >> np.arange(digits - 1, -1, -1)) & 1
+
+    def _lookup_table(self, categories):
+        bits = self._bits(len(categories))
+        zeros = np.zeros(bits.shape[1], dtype=bits.dtype)
+        return LookupTable(categories, bits, zeros, zeros)
+
+    def _encode(self, X):
+        """Encodes the encoded columns of X, after grouping their rare categories.
+        returns dict of column name to encoded values
+        """
+        X = group_columns(X, self.groupings)
+        if self.engine == 'native':
+            encoded = map_columns(lambda col: self.tables[col].transform(X[col]), self.cols, self.n_jobs,
+                                  stage='encode', rows=len(X))
+            return dict(zip(self.cols, encoded))
+        with profile_stage('category_encoders', rows=len(X)):
+            # category_encoders copies every column it is given, so only pass it the encoded ones
+            X_encoded = self.encoder.transform(missing_as_nan_columns(X[self.cols]))
+            return {col: X_encoded[self.get_mapping(col)[0].columns].values for col in self.cols}
+
+    def transform(self, X, copy=True):
         """Encodes matrix and updates features accordingly.
+        If copy is False, the columns that are not encoded share memory with X.
         returns encoded matrix (dataframe).
         """
-        X_new = self.encoder.transform(X)
-        feature_names = []
-        for feature in self.features:
-            for fname in feature.get_feature_names():
-                feature_names.append(fname)
-        X_new.columns = feature_names
+        encoded = self._encode(X)
+        with profile_stage('replace_columns', rows=len(X)):
+            X_new = replace_columns(X, encoded, self.feature_names, copy)
+        with profile_stage('downcast', rows=len(X)):
+            return downcast_columns(X_new, self.encoded_names, self.dtype)
 
-        return X_new
+    def _build_output_tables(self):
+        categories = {col: mapping_categories(mappings[1]) for col, mappings in self.mapping_index.mappings.items()}
+        return output_tables(self._encode, categories, self.dtype)
 
     def fit_transform(self, X, features, y=None):
         """First fits, then transforms matrix.
@@ -47,26 +156,76 @@ class BinaryEncoder():
         """Gets the mapping for the binary encoder and underlying ordinal encoder.
         returns tuple (binary_encoder_mapping, ordinal_encoder_mapping).
         """
-        def mapping_helper(method, category):
-            if isinstance(category, str):
-                for map in method.mapping:
-                    if map['col'] == category:
-                        return map['mapping']
-            return method.mapping[category]['mapping']
+        return self.mapping_index.get(category)
 
-        return mapping_helper(self.encoder.base_n_encoder, category), \
-            mapping_helper(self.encoder.base_n_encoder.ordinal_encoder, category)
+    def get_mappings(self):
+        """Gets the mappings of all encoded columns.
+        returns dict of column name to tuple (binary_encoder_mapping, ordinal_encoder_mapping)
+        """
+        return self.mapping_index.to_dict()
+
+    def _mapping_index(self):
+        if self.engine == 'native':
+            return MappingIndex((col, self._native_mapping(col, self.tables[col])) for col in self.cols)
+        ordinal = MappingIndex.from_list(self.encoder.base_n_encoder.ordinal_encoder.mapping)
+        return MappingIndex((entry['col'], (entry['mapping'], ordinal.get(entry['col'])))
+                            for entry in self.encoder.base_n_encoder.mapping)
+
+    @staticmethod
+    def _native_mapping(col, table):
+        """Builds the category_encoders style mappings of a column from its lookup table.
+        returns tuple (binary_encoder_mapping, ordinal_encoder_mapping)
+        """
+        mapping = pd.DataFrame(table.table, index=list(range(1, len(table.table) - 1)) + [-1, -2],
+                               columns=['%s_%d' % (col, i) for i in range(table.table.shape[1])])
+        return mapping, ordinal_mapping(table.categories)
+
+    def get_grouping(self, category):
+        """Gets the grouping of rare categories of an encoded column, by name or position among the encoded columns.
+        returns CategoryGrouping, or None if the column had no rare categories at fit time
+        """
+        if not isinstance(category, str):
+            category = self.mapping_index.columns[category]
+        return self.groupings.get(category)
+
+    def memory_usage(self, deep=True):
+        """Estimates the memory held by the fitted encoder, see sizeof.
+        returns bytes per encoded column and internal structure (pd.Series)
+        """
+        structures = [(col, 'categories', categories) for col, categories in (self.categories or {}).items()]
+        structures += [(col, 'grouping', grouping.categories) for col, grouping in self.groupings.items()]
+        if self.engine == 'native':
+            structures += [(col, 'lookup_table', table) for col, table in self.tables.items()]
+            # the native mappings are built for the index, the others are shared with category_encoders
+            structures += [(col, 'mapping', mapping) for col, mapping in self.mapping_index.mappings.items()]
+        else:
+            structures += mapping_structures(self.encoder.base_n_encoder.mapping, 'mapping')
+            structures += mapping_structures(self.encoder.base_n_encoder.ordinal_encoder.mapping, 'ordinal_mapping')
+        return structure_memory_usage(structures + table_structures(self._output_tables, self._record_tables), deep)
+
+    def strip(self):
+        """Drops the categories collected while fitting and the lookup tables built for
+        single records and saving, which are rebuilt when needed. Transforming and saving keep working.
+        returns self
+        """
+        self.categories = None
+        self._output_tables = None
+        self._record_tables = None
+        return self
 
     def encode_features_list(self, X, features):
         feature_list = []
         index = 0
         for f in features:
-            if f.get_name() in self.encoder.base_n_encoder.cols:
+            if f.get_name() in self.cols:
                 f = ft.Feature([f], primitive=BinaryEnc(self, index))
                 index += 1
             feature_list.append(f)
         return feature_list
 
+    def get_dtype(self):
+        return self.dtype
+
     def get_features(self):
         return self.features
 
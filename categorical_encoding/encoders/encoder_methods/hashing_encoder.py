@@ -1,59 +1,87 @@
 import featuretools as ft
-from category_encoders import HashingEncoder as Hashing
+from category_encoders.utils import convert_cols_to_list, get_obj_cols
 
+from categorical_encoding.encoders.encoder_methods.base import (
+    LookupTablesMixin
+)
 from categorical_encoding.primitives import HashingEnc
+from categorical_encoding.utils import (
+    feature_names,
+    get_hash_function,
+    hash_encode,
+    hash_record_table,
+    indicator_dtype,
+    map_columns,
+    profile_stage,
+    replace_columns,
+    structure_memory_usage,
+    table_structures
+)
 
 
-class HashingEncoder():
+class HashingEncoder(LookupTablesMixin):
     """Maps each categorical value to several columns using a specific hash function.
 
     Parameters:
         cols: [str]
             list of column names to encode.
         hash_method: str
-            str for hash_method name to use. Any method from hashlib works.
+            str for hash_method name to use. Any method from hashlib works,
+            as well as the faster non-cryptographic 'murmur3', 'crc32' and 'adler32'.
         n_components: int
             integer for the number of columns to map to.
+        dtype: str or numpy dtype
+            dtype of the encoded columns. 'auto' chooses the smallest type per column.
+            defaults to None, which keeps the default (int64 or float64) output.
+        n_jobs: int
+            number of threads used for per-column work. -1 uses all CPUs.
+            defaults to None, which processes columns sequentially.
     """
     name = 'hashing'
 
-    def __init__(self, cols=None, hash_method='md5', n_components=8):
-        self.encoder = {}
+    def __init__(self, cols=None, hash_method='md5', n_components=8, dtype=None, n_jobs=None):
         self.cols = cols
-        self.hash_method = 'md5'
+        self.hash_method = hash_method
         self.n_components = n_components
+        self.dtype = dtype
+        self.n_jobs = n_jobs
 
     def fit(self, X, features, y=None):
         """Fits encoder to data table.
         returns self
         """
-        self.cols = Hashing(cols=self.cols, hash_method=self.hash_method, n_components=self.n_components).fit(X, y).cols
-        for col in self.cols:
-            self.encoder[col] = Hashing(cols=[col], hash_method=self.hash_method, n_components=self.n_components)
-            self.encoder[col].fit(X[col], y)
-        self.features = self.encode_features_list(X, features)
+        get_hash_function(self.hash_method)
+        if self.cols is None:
+            self.cols = get_obj_cols(X)
+        else:
+            self.cols = convert_cols_to_list(self.cols)
+        with profile_stage('encode_features_list', rows=len(X)):
+            self.features = self.encode_features_list(X, features)
+        with profile_stage('feature_names', rows=len(X)):
+            # output names are resolved once per fit, transform only reuses them
+            self.feature_names = feature_names(self.features)
+        self.input_columns = list(X.columns)
+        self._output_tables = None
+        self._record_tables = None
         return self
 
-    def transform(self, X):
+    def transform(self, X, copy=True):
         """Encodes matrix and updates features accordingly.
+        If copy is False, the columns that are not encoded share memory with X.
         returns encoded matrix (dataframe)
         """
-        X_new = X.copy()
-        index = 0
-        for col in self.cols:
-            new_columns = self.encoder[col].transform(X[col])
-            index = X_new.columns.get_loc(col)
-            X_new.drop([col], axis=1, inplace=True)
-            for col_enc in new_columns.iloc[:, ::-1]:
-                X_new.insert(index, col_enc, new_columns[col_enc], allow_duplicates=True)
-
-        feature_names = []
-        for feature in self.features:
-            for fname in feature.get_feature_names():
-                feature_names.append(fname)
-        X_new.columns = feature_names
-
-        return X_new
+        dtype = indicator_dtype(self.dtype)
+        encoded = map_columns(lambda col: hash_encode(X[col], self.hash_method, self.n_components, dtype),
+                              self.cols, self.n_jobs, stage='encode', rows=len(X))
+        with profile_stage('replace_columns', rows=len(X)):
+            return replace_columns(X, dict(zip(self.cols, encoded)), self.feature_names, copy)
+
+    def _build_output_tables(self):
+        # hashed columns have no category tables, see hash_record_table
+        return {}
+
+    def _build_record_tables(self):
+        return {col: hash_record_table(self.hash_method, self.n_components) for col in self.cols}
 
     def fit_transform(self, X, features, y=None):
         """Fits, then transforms matrix.
@@ -61,6 +89,21 @@ class HashingEncoder():
         """
         return self.fit(X, features, y).transform(X)
 
+    def memory_usage(self, deep=True):
+        """Estimates the memory held by the fitted encoder, see sizeof.
+        returns bytes per encoded column and internal structure (pd.Series)
+        """
+        return structure_memory_usage(table_structures(self._output_tables, self._record_tables), deep)
+
+    def strip(self):
+        """Drops the lookup tables built for single records, which are rebuilt when needed.
+        Hashing keeps no training state.
+        returns self
+        """
+        self._output_tables = None
+        self._record_tables = None
+        return self
+
     def encode_features_list(self, X, features):
         feature_list = []
         for f in features:
@@ -79,6 +122,9 @@ class HashingEncoder():
         returns n_components (int)"""
         return self.n_components
 
+    def get_dtype(self):
+        return self.dtype
+
     def get_features(self):
         return self.features
 
@@ -1,67 +1,300 @@
-import featuretools as ft
+import numbers
+
+import numpy as np
+import pandas as pd
 from category_encoders import LeaveOneOutEncoder as LeaveOneOut
+from category_encoders.utils import convert_cols_to_list, get_obj_cols
 
+from categorical_encoding.encoders.encoder_methods.base import (
+    LookupTablesMixin
+)
 from categorical_encoding.primitives import LeaveOneOutEnc
+from categorical_encoding.utils import (
+    LookupTable,
+    MappingIndex,
+    TargetStatistics,
+    category_frame,
+    check_dtype,
+    check_engine,
+    check_grouping,
+    downcast_columns,
+    encoded_feature,
+    encoded_feature_names,
+    feature_names,
+    fit_groupings,
+    group_columns,
+    map_columns,
+    missing_as_nan,
+    missing_as_nan_columns,
+    output_tables,
+    profile_stage,
+    replace_columns,
+    structure_memory_usage,
+    table_structures,
+    target_frame,
+    target_sums,
+    weighted_means
+)
 
 
-class LeaveOneOutEncoder():
+class LeaveOneOutEncoder(LookupTablesMixin):
     """Maps each categorical value to one column using LeaveOneOut encoding.
 
     Parameters:
         cols: [str]
             list of column names to encode.
+        dtype: str or numpy dtype
+            dtype of the encoded columns, a float dtype. 'auto' chooses float32.
+            defaults to None, which keeps the default (float64) output.
+        n_jobs: int
+            number of threads used for per-column work. -1 uses all CPUs.
+            defaults to None, which processes columns sequentially.
+        engine: str
+            'category_encoders' (default) fits and transforms through category_encoders.
+            'native' uses lookup tables of NumPy arrays built from the fitted categories.
+        min_frequency: int or float
+            categories seen fewer times than this (a count, or a fraction of the rows
+            if below 1) are grouped into one 'other' category at fit time. In columns
+            with rare categories, values not seen during fitting are encoded as 'other'
+            too; columns without any encode them as unknown values. defaults to None.
+        max_categories: int
+            keeps at most this many of the most frequent categories and groups the
+            rest like min_frequency. defaults to None.
+        multi_class: bool
+            if True, the target holds class labels and every encoded column is replaced by
+            one column per class with the frequency of that class among the other rows of
+            the category. Requires engine='native'. defaults to False.
+        prior_weight: float
+            weight of the prior in the mean of a category, counted like that many more rows
+            with the prior as target: (sum - y + prior * prior_weight) / (count - 1 + prior_weight)
+            when fitting and (sum + prior * prior_weight) / (count + prior_weight) otherwise.
+            Larger values pull rare categories towards the prior. Requires engine='native'
+            if not 0. defaults to 0, the unweighted means of category_encoders.
     """
     name = 'leave_one_out'
 
-    def __init__(self, cols=None):
+    def __init__(self, cols=None, dtype=None, n_jobs=None, engine='category_encoders', min_frequency=None,
+                 max_categories=None, multi_class=False, prior_weight=0):
+        check_engine(engine)
+        check_grouping(min_frequency, max_categories)
+        check_dtype(dtype, 'f', "target means")
+        if multi_class and engine != 'native':
+            raise ValueError("multi_class outputs are only supported by the native engine")
+        if not isinstance(prior_weight, numbers.Real) or prior_weight < 0:
+            raise ValueError("prior_weight must be a number of at least 0, got %r" % (prior_weight,))
+        if prior_weight and engine != 'native':
+            raise ValueError("prior_weight is only supported by the native engine")
         self.encoder = LeaveOneOut(cols=cols)
+        self.engine = engine
+        self.dtype = dtype
+        self.n_jobs = n_jobs
+        self.multi_class = multi_class
+        self.prior_weight = prior_weight
+        self.classes = None
+        self.min_frequency = min_frequency
+        self.max_categories = max_categories
+        self.statistics = TargetStatistics(multi_class)
+        self.groupings = {}
 
     def fit(self, X, features, y):
         """Fits encoder to data table.
         returns self
         """
-        self.encoder.fit(X, y)
-        self.features = self.encode_features_list(X, features)
+        self.statistics = TargetStatistics(self.multi_class)
+        self.classes = None
+        cols = convert_cols_to_list(self.encoder.cols) if self.encoder.cols is not None else get_obj_cols(X)
+        self.groupings = fit_groupings(X, cols, self.min_frequency, self.max_categories)
+        return self._partial_fit(group_columns(X, self.groupings), features, y)
+
+    def partial_fit(self, X, features, y):
+        """Updates the fitted encoder with a chunk of the data table and its target column.
+        Target sums and counts per category are accumulated across calls, so fitting
+        chunk by chunk gives the same encoder as fitting on all chunks at once.
+        returns self
+        """
+        if self.statistics is None:
+            raise ValueError("The encoder was stripped of its training state. Use fit to refit it.")
+        if self.min_frequency is not None or self.max_categories is not None:
+            raise ValueError("min_frequency and max_categories need the counts of whole columns. Use fit instead.")
+        return self._partial_fit(X, features, y)
+
+    def _partial_fit(self, X, features, y):
+        cols = convert_cols_to_list(self.encoder.cols) if self.encoder.cols is not None else get_obj_cols(X)
+        self.statistics.update(X, cols, y, self.n_jobs)
+        self.classes = self.statistics.classes
+
+        if self.engine == 'native':
+            self.encoder.cols = cols
+        else:
+            with profile_stage('category_encoders', rows=len(X)):
+                categories = {col: stats.index for col, stats in self.statistics.columns.items()}
+                frame = category_frame(categories)
+                self.encoder.fit(frame, pd.Series(np.zeros(len(frame))))
+        self.encoder.mapping = {col: self._mapping(stats) for col, stats in self.statistics.columns.items()}
+        self.mapping_index = MappingIndex((col, self.encoder.mapping[col]) for col in self.encoder.cols)
+        self.encoder._mean = self.statistics.prior()
+        if self.engine == 'native':
+            with profile_stage('lookup_tables', rows=len(X)):
+                self.tables = {col: self._lookup_table(stats) for col, stats in self.statistics.columns.items()}
+        with profile_stage('encode_features_list', rows=len(X)):
+            self.features = self.encode_features_list(X, features)
+        with profile_stage('feature_names', rows=len(X)):
+            # output names are resolved once per fit, transform only reuses them
+            self.feature_names = feature_names(self.features)
+            self.encoded_names = encoded_feature_names(self.features, LeaveOneOutEnc)
+        self.input_columns = list(X.columns)
+        self._output_tables = None
+        self._record_tables = None
         return self
 
-    def transform(self, X):
+    def _mapping(self, stats):
+        """Gets the statistics of a column for get_mapping, with the class sums named
+        by their class. The mapping shares its data with the statistics.
+        returns dataframe
+        """
+        if self.classes is None:
+            return stats
+        return stats.rename(columns=dict(enumerate(self.classes)), copy=False)
+
+    def _lookup_table(self, stats):
+        """Builds the lookup table used without a target: categories seen more than
+        once map to their target mean weighted with the prior, everything else maps
+        to the global mean.
+        returns LookupTable
+        """
+        sums = target_sums(stats, self.classes)
+        counts = stats['count'].values.astype(float)
+        means = weighted_means(sums, counts, self.encoder._mean, self.prior_weight)
+        if self.classes is not None:
+            counts = counts[:, None]
+        means = np.where(counts > 1, means, self.encoder._mean)
+        return LookupTable(stats.index, means, self.encoder._mean, self.encoder._mean)
+
+    def _leave_one_out(self, col, values, y):
+        """Encodes values of a training column as (category sum - y) / (category count - 1),
+        weighted with the prior, broadcasting the fitted sums and counts to the rows.
+        Categories seen once, including missing values seen once, get the global mean
+        like in category_encoders.
+        With multi_class, y holds one indicator column per class.
+        returns np.ndarray
+        """
+        # the mapping holds the same sums and counts as the statistics and survives strip
+        stats = self.encoder.mapping[col]
+        rows = stats.index.get_indexer(missing_as_nan(values))
+        # values without a row take the trailing zero count and so the global mean
+        sums = stats['sum'] if self.classes is None else stats[self.classes]
+        sums = np.append(sums.values.astype(float), np.zeros((1,) + sums.shape[1:]), axis=0)[rows]
+        counts = np.append(stats['count'].values.astype(float), 0.0)[rows]
+        if self.classes is not None:
+            counts = counts[:, None]
+        return weighted_means(sums - y, counts - 1, self.encoder._mean, self.prior_weight)
+
+    def _encode(self, X):
+        """Encodes the encoded columns of X, after grouping their rare categories.
+        returns dict of column name to encoded values
+        """
+        X = group_columns(X, self.groupings)
+        cols = self.encoder.cols
+        if self.engine == 'native':
+            encoded = map_columns(lambda col: self.tables[col].transform(X[col]), cols, self.n_jobs,
+                                  stage='encode', rows=len(X))
+        else:
+            with profile_stage('category_encoders', rows=len(X)):
+                # category_encoders copies every column it is given, so only pass it the encoded ones
+                X_encoded = self.encoder.transform(missing_as_nan_columns(X[cols]))
+                encoded = [X_encoded[col].values for col in cols]
+        return dict(zip(cols, encoded))
+
+    def transform(self, X, copy=True):
         """Encodes matrix and updates features accordingly.
+        If copy is False, the columns that are not encoded share memory with X.
         returns encoded matrix (dataframe)
         """
-        X_new = self.encoder.transform(X)
-        X_new.columns = self._rename_columns(self.features)
-        return X_new
+        encoded = self._encode(X)
+        with profile_stage('replace_columns', rows=len(X)):
+            X_new = replace_columns(X, encoded, self.feature_names, copy)
+        with profile_stage('downcast', rows=len(X)):
+            return downcast_columns(X_new, self.encoded_names, self.dtype)
+
+    def _build_output_tables(self):
+        categories = {col: mapping.index for col, mapping in self.mapping_index.mappings.items()}
+        return output_tables(self._encode, categories, self.dtype)
 
     def fit_transform(self, X, features, y=None):
-        """First fits, then transforms matrix.
+        """First fits, then transforms matrix, leaving out each row's own target.
+        Both engines compute the training encoding natively, without refitting category_encoders.
         returns encoded matrix (dataframe)
         """
-        self.encoder.fit(X, y)
-        self.features = self.encode_features_list(X, features)
-        X_new = self.encoder.fit_transform(X, y)
-        X_new.columns = self._rename_columns(self.features)
-        return X_new
+        self.fit(X, features, y)
+        X = group_columns(X, self.groupings)
+        if self.classes is None:
+            y = np.asarray(y, dtype=float)
+        else:
+            y = target_frame(y, self.classes).values
+        cols = self.encoder.cols
+        encoded = map_columns(lambda col: self._leave_one_out(col, X[col], y), cols, self.n_jobs,
+                              stage='encode', rows=len(X))
+        with profile_stage('replace_columns', rows=len(X)):
+            X_new = replace_columns(X, dict(zip(cols, encoded)), self.feature_names)
+        with profile_stage('downcast', rows=len(X)):
+            return downcast_columns(X_new, self.encoded_names, self.dtype)
 
     def get_mapping(self, category):
-        """Gets the mapping for the LeaveOneOut encoder. Only takes strings of the column name, not the index number.
+        """Gets the mapping for the LeaveOneOut encoder, by column name or position among the encoded columns.
         returns mapping (dict)
         """
-        return self.encoder.mapping[category]
+        return self.mapping_index.get(category)
+
+    def get_mappings(self):
+        """Gets the mappings of all encoded columns.
+        returns dict of column name to mapping
+        """
+        return self.mapping_index.to_dict()
+
+    def get_grouping(self, category):
+        """Gets the grouping of rare categories of an encoded column, by name or position among the encoded columns.
+        returns CategoryGrouping, or None if the column had no rare categories at fit time
+        """
+        if not isinstance(category, str):
+            category = self.mapping_index.columns[category]
+        return self.groupings.get(category)
+
+    def memory_usage(self, deep=True):
+        """Estimates the memory held by the fitted encoder, see sizeof.
+        returns bytes per encoded column and internal structure (pd.Series)
+        """
+        # the statistics share their data with the mappings, so they are only counted once
+        structures = [(col, 'grouping', grouping.categories) for col, grouping in self.groupings.items()]
+        structures += [(col, 'mapping', mapping) for col, mapping in self.encoder.mapping.items()]
+        if self.engine == 'native':
+            structures += [(col, 'lookup_table', table) for col, table in self.tables.items()]
+        return structure_memory_usage(structures + table_structures(self._output_tables, self._record_tables), deep)
+
+    def strip(self):
+        """Drops the lookup tables built for single records and saving, which are rebuilt
+        when needed, and the reference to the statistics kept for partial_fit. The sums and
+        counts stay in the mappings, so transforming and saving keep working. partial_fit
+        needs a new fit first.
+        returns self
+        """
+        self.statistics = None
+        self._output_tables = None
+        self._record_tables = None
+        return self
 
     def encode_features_list(self, X, features):
         feature_list = []
         for f in features:
             if f.get_name() in self.encoder.cols:
-                f = ft.Feature([f], primitive=LeaveOneOutEnc(self, f.get_name()))
+                f = encoded_feature([f], LeaveOneOutEnc(self, f.get_name()))
             feature_list.append(f)
         return feature_list
 
-    def _rename_columns(self, features):
-        feature_names = []
-        for feature in features:
-            for fname in feature.get_feature_names():
-                feature_names.append(fname)
-        return feature_names
+    def get_dtype(self):
+        return self.dtype
+
+    def get_prior_weight(self):
+        return self.prior_weight
 
     def get_features(self):
         return self.features
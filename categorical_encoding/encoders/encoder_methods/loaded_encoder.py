@@ -0,0 +1,153 @@
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+
+from categorical_encoding.encoders.encoder_methods.base import (
+    LookupTablesMixin
+)
+from categorical_encoding.utils import (
+    LookupTable,
+    hash_encode,
+    hash_record_table,
+    indicator_dtype,
+    is_auto_dtype,
+    map_columns,
+    profile_stage,
+    replace_columns,
+    structure_memory_usage,
+    table_structures
+)
+
+FORMAT_VERSION = 1
+METADATA_FILE = 'encoder.json'
+
+
+def save_encoder(method, path):
+    """Saves a fitted encoder method to the directory path. Every encoded column is
+    written as a .npy table with one row per category followed by the unknown and
+    missing rows; categories, column names and options are written to encoder.json.
+    A LoadedEncoder can be saved again.
+    """
+    os.makedirs(path, exist_ok=True)
+    columns = []
+    for i, (col, table) in enumerate(method.output_tables.items()):
+        filename = 'table_%d.npy' % i
+        np.save(os.path.join(path, filename), np.ascontiguousarray(table.table))
+        columns.append({'name': col, 'categories': table.categories.tolist(), 'table': filename})
+
+    dtype = method.get_dtype()
+    if dtype is not None and not is_auto_dtype(dtype):
+        dtype = np.dtype(dtype).name
+    metadata = {'format_version': FORMAT_VERSION,
+                'method': method.get_name(),
+                'dtype': dtype,
+                'output': getattr(method, 'output', 'dataframe'),
+                'input_columns': list(method.input_columns),
+                'feature_names': list(method.feature_names),
+                'columns': columns}
+    if isinstance(method, LoadedEncoder):
+        # a loaded encoder keeps the saved options of its hashed columns
+        if method.hashing is not None:
+            metadata['hashing'] = dict(method.hashing)
+    elif method.get_name() == 'hashing':
+        metadata['hashing'] = {'columns': list(method.cols),
+                               'hash_method': method.hash_method,
+                               'n_components': method.n_components}
+    with open(os.path.join(path, METADATA_FILE), 'w') as f:
+        json.dump(metadata, f)
+
+
+class LoadedEncoder(LookupTablesMixin):
+    """Encoder method restored from the directory written by save_encoder. It can
+    transform data and single records, but not be refitted. Features are not saved,
+    so output columns are named from the saved feature names.
+
+    Parameters:
+        path: str
+            directory the encoder was saved to.
+        mmap_mode: str
+            mode used to memory-map the saved tables, see numpy.load.
+            defaults to 'r', so processes loading the same encoder share the tables.
+            None reads the tables into memory.
+    """
+
+    def __init__(self, path, mmap_mode='r'):
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        if metadata.get('format_version') != FORMAT_VERSION:
+            raise ValueError("Unsupported encoder format version %s, expected %s"
+                             % (metadata.get('format_version'), FORMAT_VERSION))
+        self.name = metadata['method']
+        self.dtype = metadata['dtype']
+        self.output = metadata['output']
+        self.input_columns = metadata['input_columns']
+        self.feature_names = metadata['feature_names']
+        self._output_tables = {}
+        for column in metadata['columns']:
+            table = np.load(os.path.join(path, column['table']), mmap_mode=mmap_mode)
+            self._output_tables[column['name']] = LookupTable.from_table(column['categories'], table)
+        self.hashing = metadata.get('hashing')
+        self._record_tables = None
+
+    def fit(self, X, features, y=None):
+        raise TypeError("A loaded encoder cannot be refitted")
+
+    def transform(self, X, copy=True):
+        """Encodes matrix with the saved tables.
+        If copy is False, the columns that are not encoded share memory with X.
+        returns encoded matrix (dataframe or scipy.sparse.csr_matrix)
+        """
+        encoded = map_columns(lambda col: self.output_tables[col].transform(X[col]), self.output_tables,
+                              stage='encode', rows=len(X))
+        encoded = dict(zip(self.output_tables, encoded))
+        if self.hashing is not None:
+            dtype = indicator_dtype(self.dtype)
+            hashed = map_columns(lambda col: hash_encode(X[col], self.hashing['hash_method'],
+                                                         self.hashing['n_components'], dtype),
+                                 self.hashing['columns'], stage='encode', rows=len(X))
+            encoded.update(zip(self.hashing['columns'], hashed))
+        if self.output == 'sparse':
+            blocks = [encoded[col] if col in encoded else X[col].values.astype(float) for col in X.columns]
+            # like OneHotEncoder, sparse outputs are float unless a dtype was given
+            dtype = float if self.dtype is None else None
+            return sparse.hstack([sparse.csr_matrix(block.reshape(len(X), -1), dtype=dtype) for block in blocks],
+                                 format='csr')
+        with profile_stage('replace_columns', rows=len(X)):
+            return replace_columns(X, encoded, self.feature_names, copy)
+
+    def _build_record_tables(self):
+        # built on first use, so loading stays cheap for processes that only transform frames
+        record_tables = {col: table.record_table() for col, table in self.output_tables.items()}
+        if self.hashing is not None:
+            for col in self.hashing['columns']:
+                record_tables[col] = hash_record_table(self.hashing['hash_method'], self.hashing['n_components'])
+        return record_tables
+
+    def memory_usage(self, deep=True):
+        """Estimates the memory held by the loaded encoder, see sizeof.
+        Memory-mapped tables are counted in full. Record tables are only reported once built.
+        returns bytes per encoded column and internal structure (pd.Series)
+        """
+        return structure_memory_usage(table_structures(self.output_tables, self._record_tables), deep)
+
+    def strip(self):
+        """Drops the lookup tables built for single records, which are rebuilt when needed.
+        A loaded encoder holds no training state.
+        returns self
+        """
+        self._record_tables = None
+        return self
+
+    def get_feature_names(self):
+        return list(self.feature_names)
+
+    def get_features(self):
+        raise TypeError("Features are not saved with the encoder. Use get_feature_names instead.")
+
+    def get_dtype(self):
+        return self.dtype
+
+    def get_name(self):
+        return self.name
@@ -2,14 +2,40 @@ import logging
 
 import featuretools as ft
 import numpy as np
+import pandas as pd
 from category_encoders import OneHotEncoder as OneHot
+from category_encoders.utils import convert_cols_to_list, get_obj_cols
+from scipy import sparse
 
+from categorical_encoding.encoders.encoder_methods.base import (
+    LookupTablesMixin
+)
 from categorical_encoding.primitives import OneHotEnc
+from categorical_encoding.utils import (
+    LookupTable,
+    MappingIndex,
+    SpaceSaving,
+    category_frame,
+    check_engine,
+    check_grouping,
+    feature_names,
+    frequent_categories,
+    indicator_dtype,
+    map_columns,
+    mapping_structures,
+    profile_stage,
+    replace_columns,
+    structure_memory_usage,
+    table_structures
+)
 
 logger = logging.getLogger('featuretools')
 
+# rows counted exactly at a time before merging into a sketch, bounding fit memory with sketch_error
+SKETCH_CHUNK_ROWS = 65536
 
-class OneHotEncoder():
+
+class OneHotEncoder(LookupTablesMixin):
     """Maps each categorical value to several columns using one-hot encoding.
 
     Parameters:
@@ -20,28 +46,195 @@ class OneHotEncoder():
             selects based off of number of occurences of value
             defaults to 15
             'None' will result in all unique values being encoded.
+        output: str
+            'dataframe' (default) returns a dataframe from transform.
+            'sparse' returns a scipy.sparse CSR matrix whose columns are aligned with
+            the names of get_features(); every column of the data table must then be numeric.
+        keep_matrix: bool
+            if True, the encoded training matrix is stored in `matrix` when fitting.
+            defaults to False so the fitted encoder only holds the learned labels.
+        dtype: str or numpy dtype
+            dtype of the encoded columns. 'auto' chooses the smallest type per column.
+            defaults to None, which keeps the default (int64 or float64) output.
+        n_jobs: int
+            number of threads used for per-column work. -1 uses all CPUs.
+            defaults to None, which processes columns sequentially.
+        engine: str
+            'category_encoders' (default) also fits the category_encoders mapping returned by get_mapping.
+            'native' only learns the top labels, which is all transform needs.
+        min_frequency: int or float
+            values seen fewer times than this (a count, or a fraction of the rows if below 1)
+            are not encoded. Like values outside the top_n labels, they have no indicator set.
+            defaults to None.
+        max_categories: int
+            encodes at most this many of the most frequent values, like top_n. defaults to None.
+        sketch_error: float
+            if set, the most frequent values are found with a Space-Saving sketch per column
+            holding ceil(1 / sketch_error) counts (at least top_n), instead of counting every value.
+            Counts are overestimated by at most sketch_error times the number of rows, so values
+            more frequent than that are always found. fit feeds each column to its sketch in
+            chunks of rows, so neither counting nor the category_encoders mapping holds more
+            than the kept values and one chunk. The sketches are kept, and partial_fit chunks
+            are merged into them. defaults to None, which counts exactly.
     """
     name = 'one_hot'
 
-    def __init__(self, cols=None, top_n=15):
+    def __init__(self, cols=None, top_n=15, output='dataframe', keep_matrix=False, dtype=None, n_jobs=None,
+                 engine='category_encoders', min_frequency=None, max_categories=None, sketch_error=None):
+        check_engine(engine)
+        check_grouping(min_frequency, max_categories)
+        if output not in ('dataframe', 'sparse'):
+            raise ValueError("'%s' is not a supported output. Use 'dataframe' or 'sparse'." % output)
+        if sketch_error is not None and not 0 < sketch_error < 1:
+            raise ValueError("sketch_error must be between 0 and 1, got %r" % (sketch_error,))
         self.encoder = OneHot(cols=cols)
         self.matrix = None
         self.top_n = top_n
+        self.output = output
+        self.keep_matrix = keep_matrix
+        self.dtype = dtype
+        self.n_jobs = n_jobs
+        self.engine = engine
+        self.min_frequency = min_frequency
+        self.max_categories = max_categories
+        self.sketch_error = sketch_error
+        self.sketches = None
 
     def fit(self, X, features, y=None):
         """Fits encoder to data table.
         returns self
         """
-        self.encoder.fit(X, y=None)
-        self.features = self.encode_features_list(X, features)
+        self.sketches = None
+        if self.sketch_error is not None:
+            # start from empty sketches, fed chunk by chunk to stay within their capacity
+            self.sketches = {}
+            return self._fit_sketches(X, features, chunk_rows=max(SKETCH_CHUNK_ROWS, self._sketch_capacity()))
+        if self.engine == 'native':
+            cols = self.encoder.cols
+            self.encoder.cols = convert_cols_to_list(cols) if cols is not None else get_obj_cols(X)
+        else:
+            with profile_stage('category_encoders', rows=len(X)):
+                self.encoder.fit(X, y=None)
+        return self._fit(X, features)
+
+    def partial_fit(self, X, features, y=None):
+        """Updates the fitted encoder with a chunk of the data table. Value counts of the
+        encoded columns are accumulated across calls, exactly or in Space-Saving sketches
+        with sketch_error, and labels are chosen from the counts of all chunks so far.
+        returns self
+        """
+        if self.sketches is None and hasattr(self, 'features'):
+            raise ValueError("The encoder keeps no value counts after fit without sketch_error or strip. "
+                             "Use partial_fit for every chunk.")
+        if self.sketches is None:
+            self.sketches = {}
+        return self._fit_sketches(X, features, chunk_rows=None)
+
+    def _fit_sketches(self, X, features, chunk_rows):
+        """Adds the values of the encoded columns to their sketches, chunk_rows rows at a
+        time or all at once if None, and fits on the values the sketches keep.
+        returns self
+        """
+        cols = self.encoder.cols
+        self.encoder.cols = convert_cols_to_list(cols) if cols is not None else get_obj_cols(X)
+        capacity = self._sketch_capacity()
+        step = chunk_rows or max(len(X), 1)
+
+        def update(col):
+            sketch = self.sketches.get(col, SpaceSaving(capacity))
+            for start in range(0, len(X), step):
+                sketch.update(X[col].iloc[start:start + step])
+            return sketch
+
+        sketches = map_columns(update, self.encoder.cols, self.n_jobs, stage='sketches', rows=len(X))
+        self.sketches.update(zip(self.encoder.cols, sketches))
+        if self.engine != 'native':
+            # the category_encoders mapping covers the values the sketches keep
+            categories = {col: self._sketch_categories(sketch) for col, sketch in self.sketches.items()}
+            with profile_stage('category_encoders', rows=len(X)):
+                self.encoder.fit(category_frame(categories), y=None)
+        return self._fit(X, features)
+
+    def _sketch_capacity(self):
+        if self.sketch_error is None:
+            return None
+        return max(int(np.ceil(1 / self.sketch_error)), self.top_n or 0)
+
+    @staticmethod
+    def _sketch_categories(sketch):
+        categories = sketch.top()
+        if sketch.n_missing:
+            categories = categories.append(pd.Index([np.nan]))
+        return categories
+
+    def _fit(self, X, features):
+        if self.engine != 'native':
+            with profile_stage('mapping_index', rows=len(X)):
+                self.mapping_index = MappingIndex.from_list(self.encoder.mapping)
+        with profile_stage('encode_features_list', rows=len(X)):
+            self.features = self.encode_features_list(X, features)
+        with profile_stage('feature_names', rows=len(X)):
+            # output names are resolved once per fit, transform only reuses them
+            self.feature_names = feature_names(self.features)
+        self.input_columns = list(X.columns)
+        self._output_tables = None
+        self._record_tables = None
+        if self.keep_matrix:
+            self.matrix = self.transform(X)
         return self
 
-    def transform(self, X):
-        """Encodes matrix and updates features accordingly.
-        returns encoded matrix (dataframe)
+    def transform(self, X, copy=True):
+        """Encodes matrix using the learned labels and updates features accordingly.
+        Values outside the learned labels are marked in the unknown column, if there is one.
+        If copy is False, the columns that are not encoded share memory with X (dataframe output only).
+        returns encoded matrix (dataframe or scipy.sparse.csr_matrix)
+        """
+        assert(hasattr(self, 'columns')), "Check that the encoder is fitted."
+
+        encoded_columns = dict(self.columns)
+
+        def encode_column(name):
+            encoded_names = encoded_columns[name]
+            if encoded_names is None:
+                if self.output == 'sparse':
+                    return sparse.csr_matrix(X[name].values.astype(float).reshape(-1, 1))
+                return X[name]
+            labels = self.labels[name]
+            codes = pd.Index(labels).get_indexer(X[name])
+            if self.has_unknown[name]:
+                codes[codes == -1] = len(labels)
+            return self._indicators(codes, X.index, encoded_names)
+
+        if self.output == 'dataframe' and not copy:
+            names = [name for name, encoded_names in self.columns if encoded_names is not None]
+            blocks = map_columns(encode_column, names, self.n_jobs, stage='encode', rows=len(X))
+            encoded = {name: block.values for name, block in zip(names, blocks)}
+            with profile_stage('replace_columns', rows=len(X)):
+                return replace_columns(X, encoded, self.feature_names, copy=False)
+
+        blocks = map_columns(encode_column, [name for name, _ in self.columns], self.n_jobs,
+                             stage='encode', rows=len(X))
+        with profile_stage('concat', rows=len(X)):
+            if self.output == 'sparse':
+                return sparse.hstack(blocks, format='csr')
+            # one concat is faster than inserting many indicator columns one at a time
+            return pd.concat(blocks, axis=1)
+
+    def _build_output_tables(self):
+        return {name: self._output_table(name, encoded_names)
+                for name, encoded_names in self.columns if encoded_names is not None}
+
+    def _output_table(self, name, encoded_names):
+        """Builds the table of indicator outputs of one encoded column.
+        returns LookupTable
         """
-        assert(self.matrix is not None), "Check that the encoder is fitted."
-        return self.matrix
+        labels = self.labels[name]
+        dtype = indicator_dtype(self.dtype)
+        values = np.eye(len(labels), len(encoded_names), dtype=dtype)
+        unknown = np.zeros(len(encoded_names), dtype=dtype)
+        if self.has_unknown[name]:
+            unknown[len(labels)] = 1
+        return LookupTable(labels, values, unknown, unknown)
 
     def fit_transform(self, X, features=None, y=None):
         """First fits, then transforms matrix.
@@ -53,44 +246,114 @@ class OneHotEncoder():
         """Gets the mapping for the one-hot encoder.
         returns mapping (dict)
         """
-        if isinstance(category, str):
-            for map in self.encoder.mapping:
-                if map['col'] == category:
-                    return map['mapping']
-        return self.encoder.mapping[category]['mapping']
+        self._check_mapping()
+        return self.mapping_index.get(category)
+
+    def get_mappings(self):
+        """Gets the mappings of all encoded columns.
+        returns dict of column name to mapping
+        """
+        self._check_mapping()
+        return self.mapping_index.to_dict()
+
+    def _check_mapping(self):
+        if self.engine == 'native':
+            raise ValueError("The native engine does not build a category_encoders mapping. "
+                             "Use the labels attribute instead.")
+
+    def memory_usage(self, deep=True):
+        """Estimates the memory held by the fitted encoder, see sizeof.
+        The training matrix kept with keep_matrix is reported with None as column.
+        returns bytes per encoded column and internal structure (pd.Series)
+        """
+        structures = [(col, 'labels', labels) for col, labels in self.labels.items()]
+        if self.engine != 'native':
+            structures += mapping_structures(self.encoder.mapping, 'mapping')
+            structures += mapping_structures(self.encoder.ordinal_encoder.mapping, 'ordinal_mapping')
+        for col, sketch in (self.sketches or {}).items():
+            structures.append((col, 'sketch', [sketch.counts, sketch.errors]))
+        structures.append((None, 'matrix', self.matrix))
+        return structure_memory_usage(structures + table_structures(self._output_tables, self._record_tables), deep)
+
+    def strip(self):
+        """Drops the training matrix kept with keep_matrix, the value counts kept for
+        partial_fit and the lookup tables built for single records and saving, which are
+        rebuilt when needed. Transforming and saving keep working, but partial_fit cannot continue.
+        returns self
+        """
+        self.matrix = None
+        self.sketches = None
+        self._output_tables = None
+        self._record_tables = None
+        return self
+
+    def get_feature_names(self):
+        """Gets the names of the encoded columns, in output order.
+        returns feature names ([str])
+        """
+        return list(self.feature_names)
 
     def encode_features_list(self, X, features):
-        X_new = X.copy()
+        self.columns = []
+        self.labels = {}
+        self.has_unknown = {}
         feature_list = []
+        encoded_cols = [f.get_name() for f in features if f.get_name() in self.encoder.cols]
+        top_labels = map_columns(lambda name: self._top_n_labels(name, X[name]), encoded_cols, self.n_jobs,
+                                 stage='labels', rows=len(X))
+        top_labels = dict(zip(encoded_cols, top_labels))
         for f in features:
             if f.number_output_features > 1:
                 logger.warning("Feature %s has multiple columns. One-Hot Encoder may not properly encode."
                                "Consider using another encoding method or the `encoder` property value assigned "
                                "to this OneHotEncoder class instance." % (f))
-            if f.get_name() in self.encoder.cols:
-                val_counts = X[f.get_name()].value_counts().to_frame()
-                val_counts.sort_values(f.get_name(), ascending=False)
-                if self.top_n is None:
-                    self.top_n = len(val_counts)
-                unique = val_counts.head(self.top_n).index.tolist()
-
-                index = X_new.columns.get_loc(f.get_name())
-                for label in unique:
-                    add = ft.Feature([f], primitive=OneHotEnc(label))
-                    feature_list.append(add)
-                    X_new.insert(index, add.get_name(), (X_new[f.get_name()] == label).astype(int), allow_duplicates=True)
-                    index += 1
-                has_unknown = X[f.get_name()].isnull().values.any()
+            name = f.get_name()
+            if name in self.encoder.cols:
+                labels = top_labels[name]
+                encoded = [ft.Feature([f], primitive=OneHotEnc(label, self.dtype)) for label in labels]
+                if self.sketches is not None:
+                    has_unknown = self.sketches[name].n_missing > 0
+                else:
+                    has_unknown = X[name].isnull().values.any()
                 if has_unknown:
-                    unknown = ft.Feature([f], primitive=OneHotEnc(np.nan))
-                    feature_list.append(unknown)
-                    X_new.insert(index, unknown.get_name(), (~X_new[f.get_name()].isin(unique)).astype(int), allow_duplicates=True)
-                X_new.drop([f.get_name()], axis=1, inplace=True)
+                    encoded.append(ft.Feature([f], primitive=OneHotEnc(np.nan, self.dtype)))
+                self.labels[name] = labels
+                self.has_unknown[name] = has_unknown
+                self.columns.append((name, [e.get_name() for e in encoded]))
+                feature_list.extend(encoded)
             else:
+                self.columns.append((name, None))
                 feature_list.append(f)
-        self.matrix = X_new
         return feature_list
 
+    def _top_n_labels(self, name, column):
+        """Counts the values of the column in one pass, or takes the counts of the chunks
+        seen by partial_fit, and keeps the top_n most frequent values that pass
+        min_frequency and max_categories.
+        returns labels ordered by descending count
+        """
+        if self.sketches is not None:
+            sketch = self.sketches[name]
+        else:
+            # without sketch_error the sketch keeps every value, counting exactly
+            sketch = SpaceSaving(self._sketch_capacity()).update(column)
+        labels = frequent_categories(sketch.counts, sketch.n_rows, self.min_frequency, self.max_categories)
+        if self.top_n is not None:
+            labels = labels[:self.top_n]
+        return labels.tolist()
+
+    def _indicators(self, codes, index, columns):
+        rows = np.flatnonzero(codes != -1)
+        if self.output == 'sparse':
+            data = np.ones(len(rows), dtype=float if self.dtype is None else indicator_dtype(self.dtype))
+            return sparse.csr_matrix((data, (rows, codes[rows])), shape=(len(codes), len(columns)))
+        block = np.zeros((len(codes), len(columns)), dtype=indicator_dtype(self.dtype))
+        block[rows, codes[rows]] = 1
+        return pd.DataFrame(block, index=index, columns=columns)
+
+    def get_dtype(self):
+        return self.dtype
+
     def get_features(self):
         return self.features
 
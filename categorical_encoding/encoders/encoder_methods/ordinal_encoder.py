@@ -1,40 +1,170 @@
 import featuretools as ft
+import numpy as np
 from category_encoders import OrdinalEncoder as Ordinal
+from category_encoders.utils import convert_cols_to_list, get_obj_cols
 
+from categorical_encoding.encoders.encoder_methods.base import (
+    LookupTablesMixin
+)
 from categorical_encoding.primitives import OrdinalEnc
+from categorical_encoding.utils import (
+    LookupTable,
+    MappingIndex,
+    category_frame,
+    check_dtype,
+    check_engine,
+    check_grouping,
+    check_integer_range,
+    downcast_columns,
+    encoded_feature_names,
+    feature_names,
+    fit_groupings,
+    group_columns,
+    integer_dtype,
+    is_auto_dtype,
+    map_columns,
+    mapping_categories,
+    mapping_structures,
+    merge_categories,
+    missing_as_nan_columns,
+    ordinal_mapping,
+    output_tables,
+    profile_stage,
+    replace_columns,
+    structure_memory_usage,
+    table_structures
+)
 
 
-class OrdinalEncoder():
+class OrdinalEncoder(LookupTablesMixin):
     """Maps each categorical value to one column using ordinal encoding.
 
     Parameters:
         cols: [str]
             list of column names to encode.
+        dtype: str or numpy dtype
+            dtype of the encoded columns. 'auto' chooses the smallest integer type
+            holding every learned code, so all transforms share one dtype. Other dtypes
+            must be signed integers or floats, as unknown and missing values are coded -1 and -2.
+            defaults to None, which keeps the default (int64) output.
+        n_jobs: int
+            number of threads used for per-column work. -1 uses all CPUs.
+            defaults to None, which processes columns sequentially.
+        engine: str
+            'category_encoders' (default) fits and transforms through category_encoders.
+            'native' uses lookup tables of NumPy arrays built from the fitted categories.
+        min_frequency: int or float
+            categories seen fewer times than this (a count, or a fraction of the rows
+            if below 1) are grouped into one 'other' category at fit time. In columns
+            with rare categories, values not seen during fitting are encoded as 'other'
+            too; columns without any encode them as unknown values. defaults to None.
+        max_categories: int
+            keeps at most this many of the most frequent categories and groups the
+            rest like min_frequency. defaults to None.
     """
     name = 'ordinal'
 
-    def __init__(self, cols=None):
+    def __init__(self, cols=None, dtype=None, n_jobs=None, engine='category_encoders', min_frequency=None,
+                 max_categories=None):
+        check_engine(engine)
+        check_grouping(min_frequency, max_categories)
+        check_dtype(dtype, 'if', "ordinal codes, which are -1 and -2 for unknown and missing values")
         self.encoder = Ordinal(cols=cols)
+        self.engine = engine
+        self.dtype = dtype
+        self.n_jobs = n_jobs
+        self.encoded_dtype = dtype
+        self.min_frequency = min_frequency
+        self.max_categories = max_categories
+        self.categories = {}
+        self.groupings = {}
 
     def fit(self, X, features, y=None):
         """Fits encoder to data table.
         returns self
         """
-        self.encoder.fit(X, y=None)
-        self.features = self.encode_features_list(X, features)
+        self.categories = {}
+        cols = convert_cols_to_list(self.encoder.cols) if self.encoder.cols is not None else get_obj_cols(X)
+        self.groupings = fit_groupings(X, cols, self.min_frequency, self.max_categories)
+        return self._partial_fit(group_columns(X, self.groupings), features, y)
+
+    def partial_fit(self, X, features, y=None):
+        """Updates the fitted encoder with a chunk of the data table.
+        Categories are accumulated across calls in first-seen order, so fitting
+        chunk by chunk learns the same codes as fitting on all chunks at once.
+        returns self
+        """
+        if self.categories is None:
+            raise ValueError("The encoder was stripped of its training state. Use fit to refit it.")
+        if self.min_frequency is not None or self.max_categories is not None:
+            raise ValueError("min_frequency and max_categories need the counts of whole columns. Use fit instead.")
+        return self._partial_fit(X, features, y)
+
+    def _partial_fit(self, X, features, y=None):
+        cols = convert_cols_to_list(self.encoder.cols) if self.encoder.cols is not None else get_obj_cols(X)
+        merged = map_columns(lambda col: merge_categories(self.categories.get(col), X[col]), cols, self.n_jobs,
+                             stage='categories', rows=len(X))
+        categories = dict(self.categories)
+        categories.update(zip(cols, merged))
+        # codes run from -2 (missing) and -1 (unknown) up to the number of categories
+        n_codes = max([len(c) for c in categories.values()] + [0])
+        check_integer_range(self.dtype, -2, n_codes)
+        self.categories = categories
+        if self.engine == 'native':
+            self.encoder.cols = cols
+            with profile_stage('lookup_tables', rows=len(X)):
+                self.tables = {col: LookupTable(categories, np.arange(1, len(categories) + 1), -1, -2)
+                               for col, categories in self.categories.items()}
+        else:
+            # category_encoders reuses an existing mapping when refitting, so clear it
+            self.encoder.mapping = None
+            with profile_stage('category_encoders', rows=len(X)):
+                self.encoder.fit(category_frame(self.categories), y=None)
+        with profile_stage('mapping_index', rows=len(X)):
+            self.mapping_index = self._mapping_index()
+        if is_auto_dtype(self.dtype):
+            self.encoded_dtype = integer_dtype(-2, n_codes)
+        with profile_stage('encode_features_list', rows=len(X)):
+            self.features = self.encode_features_list(X, features)
+        with profile_stage('feature_names', rows=len(X)):
+            # output names are resolved once per fit, transform only reuses them
+            self.feature_names = feature_names(self.features)
+            self.encoded_names = encoded_feature_names(self.features, OrdinalEnc)
+        self.input_columns = list(X.columns)
+        self._output_tables = None
+        self._record_tables = None
         return self
 
-    def transform(self, X):
+    def _encode(self, X):
+        """Encodes the encoded columns of X, after grouping their rare categories.
+        returns dict of column name to encoded values
+        """
+        X = group_columns(X, self.groupings)
+        cols = self.encoder.cols
+        if self.engine == 'native':
+            encoded = map_columns(lambda col: self.tables[col].transform(X[col]), cols, self.n_jobs,
+                                  stage='encode', rows=len(X))
+        else:
+            with profile_stage('category_encoders', rows=len(X)):
+                # category_encoders copies every column it is given, so only pass it the encoded ones
+                X_encoded = self.encoder.transform(missing_as_nan_columns(X[cols]))
+                encoded = [X_encoded[col].values for col in cols]
+        return dict(zip(cols, encoded))
+
+    def transform(self, X, copy=True):
         """Encodes matrix and updates features accordingly.
+        If copy is False, the columns that are not encoded share memory with X.
         returns encoded matrix (dataframe)
         """
-        X_new = self.encoder.transform(X)
-        feature_names = []
-        for feature in self.features:
-            for fname in feature.get_feature_names():
-                feature_names.append(fname)
-        X_new.columns = feature_names
-        return X_new
+        encoded = self._encode(X)
+        with profile_stage('replace_columns', rows=len(X)):
+            X_new = replace_columns(X, encoded, self.feature_names, copy)
+        with profile_stage('downcast', rows=len(X)):
+            return downcast_columns(X_new, self.encoded_names, self.encoded_dtype)
+
+    def _build_output_tables(self):
+        categories = {col: mapping_categories(mapping) for col, mapping in self.mapping_index.mappings.items()}
+        return output_tables(self._encode, categories, self.encoded_dtype)
 
     def fit_transform(self, X, features, y=None):
         """First fits, then transforms matrix.
@@ -46,11 +176,51 @@ class OrdinalEncoder():
         """Gets the mapping the ordinal encoder.
         returns mapping (dict)
         """
-        if isinstance(category, str):
-            for map in self.encoder.mapping:
-                if map['col'] == category:
-                    return map['mapping']
-        return self.encoder.mapping[category]['mapping']
+        return self.mapping_index.get(category)
+
+    def get_mappings(self):
+        """Gets the mappings of all encoded columns.
+        returns dict of column name to mapping
+        """
+        return self.mapping_index.to_dict()
+
+    def _mapping_index(self):
+        if self.engine == 'native':
+            return MappingIndex((col, ordinal_mapping(self.tables[col].categories)) for col in self.encoder.cols)
+        return MappingIndex.from_list(self.encoder.mapping)
+
+    def get_grouping(self, category):
+        """Gets the grouping of rare categories of an encoded column, by name or position among the encoded columns.
+        returns CategoryGrouping, or None if the column had no rare categories at fit time
+        """
+        if not isinstance(category, str):
+            category = self.mapping_index.columns[category]
+        return self.groupings.get(category)
+
+    def memory_usage(self, deep=True):
+        """Estimates the memory held by the fitted encoder, see sizeof.
+        returns bytes per encoded column and internal structure (pd.Series)
+        """
+        structures = [(col, 'categories', categories) for col, categories in (self.categories or {}).items()]
+        structures += [(col, 'grouping', grouping.categories) for col, grouping in self.groupings.items()]
+        if self.engine == 'native':
+            structures += [(col, 'lookup_table', table) for col, table in self.tables.items()]
+            # the native mappings are built for the index, the others are shared with category_encoders
+            structures += [(col, 'mapping', mapping) for col, mapping in self.mapping_index.mappings.items()]
+        else:
+            structures += mapping_structures(self.encoder.mapping, 'mapping')
+        return structure_memory_usage(structures + table_structures(self._output_tables, self._record_tables), deep)
+
+    def strip(self):
+        """Drops the categories kept to continue fitting with partial_fit and the lookup
+        tables built for single records and saving, which are rebuilt when needed.
+        Transforming and saving keep working, partial_fit needs a new fit first.
+        returns self
+        """
+        self.categories = None
+        self._output_tables = None
+        self._record_tables = None
+        return self
 
     def encode_features_list(self, X, features):
         feature_list = []
@@ -62,6 +232,9 @@ class OrdinalEncoder():
             feature_list.append(f)
         return feature_list
 
+    def get_dtype(self):
+        return self.encoded_dtype
+
     def get_features(self):
         return self.features
 
@@ -1,68 +1,312 @@
-import featuretools as ft
+import numbers
+
+import numpy as np
+import pandas as pd
 from category_encoders import TargetEncoder as Target
+from category_encoders.utils import convert_cols_to_list, get_obj_cols
 
+from categorical_encoding.encoders.encoder_methods.base import (
+    LookupTablesMixin
+)
 from categorical_encoding.primitives import TargetEnc
+from categorical_encoding.utils import (
+    LookupTable,
+    MappingIndex,
+    TargetStatistics,
+    category_frame,
+    check_dtype,
+    check_engine,
+    check_grouping,
+    downcast_columns,
+    encoded_feature,
+    encoded_feature_names,
+    feature_names,
+    fit_groupings,
+    fold_ids,
+    group_columns,
+    map_columns,
+    mapping_categories,
+    mapping_structures,
+    missing_as_nan_columns,
+    ordinal_mapping,
+    out_of_fold_sums,
+    output_tables,
+    profile_stage,
+    replace_columns,
+    smoothed_means,
+    structure_memory_usage,
+    table_structures,
+    target_frame,
+    target_sums
+)
 
 
-class TargetEncoder():
+class TargetEncoder(LookupTablesMixin):
     """Maps each categorical value to one column using target encoding.
 
     Parameters:
         cols: [str]
             list of column names to encode.
+        dtype: str or numpy dtype
+            dtype of the encoded columns, a float dtype. 'auto' chooses float32.
+            defaults to None, which keeps the default (float64) output.
+        n_jobs: int
+            number of threads used for per-column work. -1 uses all CPUs.
+            defaults to None, which processes columns sequentially.
+        engine: str
+            'category_encoders' (default) fits and transforms through category_encoders.
+            'native' uses lookup tables of NumPy arrays built from the fitted categories.
+        min_frequency: int or float
+            categories seen fewer times than this (a count, or a fraction of the rows
+            if below 1) are grouped into one 'other' category at fit time. In columns
+            with rare categories, values not seen during fitting are encoded as 'other'
+            too; columns without any encode them as unknown values. defaults to None.
+        max_categories: int
+            keeps at most this many of the most frequent categories and groups the
+            rest like min_frequency. defaults to None.
+        cv: int
+            if set, fit_transform encodes each training row with the smoothed target mean of
+            the rows in the other of cv contiguous folds, so a row's own target does not leak
+            into its encoding. Shuffle the rows first if their order is not random.
+            The fitted encoder and transform still use all rows. defaults to None.
+        smoothing: float
+            slope of the weighting between a category's target mean and the prior, like
+            in category_encoders. Larger values blend in more of the prior. defaults to 1.0.
+        min_samples_leaf: int
+            count at which a category's mean and the prior are weighted equally. defaults to 1.
+        multi_class: bool
+            if True, the target holds class labels and every encoded column is replaced by
+            one column per class with the smoothed frequency of that class in the category.
+            Requires engine='native'. defaults to False.
     """
     name = 'target'
 
-    def __init__(self, cols=None):
-        self.encoder = Target(cols=cols)
+    def __init__(self, cols=None, dtype=None, n_jobs=None, engine='category_encoders', min_frequency=None,
+                 max_categories=None, cv=None, smoothing=1.0, min_samples_leaf=1, multi_class=False):
+        check_engine(engine)
+        check_grouping(min_frequency, max_categories)
+        check_dtype(dtype, 'f', "target means")
+        if cv is not None and (not isinstance(cv, numbers.Integral) or cv < 2):
+            raise ValueError("cv must be an integer of at least 2, got %r" % (cv,))
+        if multi_class and engine != 'native':
+            raise ValueError("multi_class outputs are only supported by the native engine")
+        self.encoder = Target(cols=cols, smoothing=smoothing, min_samples_leaf=min_samples_leaf)
+        self.engine = engine
+        self.dtype = dtype
+        self.n_jobs = n_jobs
+        self.multi_class = multi_class
+        self.classes = None
+        self.min_frequency = min_frequency
+        self.max_categories = max_categories
+        self.cv = cv
+        self.statistics = TargetStatistics(multi_class)
+        self.groupings = {}
 
     def fit(self, X, features, y):
         """Fits encoder to data table based on given target column.
         returns self
         """
-        self.encoder.fit(X, y)
-        self.features = self.encode_features_list(X, features)
+        self.statistics = TargetStatistics(self.multi_class)
+        self.classes = None
+        cols = convert_cols_to_list(self.encoder.cols) if self.encoder.cols is not None else get_obj_cols(X)
+        self.groupings = fit_groupings(X, cols, self.min_frequency, self.max_categories)
+        return self._partial_fit(group_columns(X, self.groupings), features, y)
+
+    def partial_fit(self, X, features, y):
+        """Updates the fitted encoder with a chunk of the data table and its target column.
+        Target sums and counts per category are accumulated across calls, so fitting
+        chunk by chunk gives the same encoder as fitting on all chunks at once.
+        returns self
+        """
+        if self.statistics is None:
+            raise ValueError("The encoder was stripped of its training state. Use fit to refit it.")
+        if self.min_frequency is not None or self.max_categories is not None:
+            raise ValueError("min_frequency and max_categories need the counts of whole columns. Use fit instead.")
+        return self._partial_fit(X, features, y)
+
+    def _partial_fit(self, X, features, y):
+        cols = convert_cols_to_list(self.encoder.cols) if self.encoder.cols is not None else get_obj_cols(X)
+        self.statistics.update(X, cols, y, self.n_jobs)
+        self.classes = self.statistics.classes
+
+        if self.engine == 'native':
+            self.encoder.cols = cols
+            with profile_stage('lookup_tables', rows=len(X)):
+                self.encoder.mapping, self.encoder._mean, ordinal = self._target_mapping()
+                self.tables = {col: LookupTable(stats.index, self.encoder.mapping[col].values[:-2],
+                                                self.encoder._mean, self.encoder._mean)
+                               for col, stats in self.statistics.columns.items()}
+        else:
+            with profile_stage('category_encoders', rows=len(X)):
+                categories = {col: stats.index for col, stats in self.statistics.columns.items()}
+                frame = category_frame(categories)
+                self.encoder.fit(frame, pd.Series(np.zeros(len(frame))))
+                self.encoder.mapping, self.encoder._mean, ordinal = self._target_mapping()
+        with profile_stage('mapping_index', rows=len(X)):
+            self.mapping_index = MappingIndex((col, (self.encoder.mapping[col], ordinal[col]))
+                                              for col in self.encoder.cols)
+        with profile_stage('encode_features_list', rows=len(X)):
+            self.features = self.encode_features_list(X, features)
+        with profile_stage('feature_names', rows=len(X)):
+            # output names are resolved once per fit, transform only reuses them
+            self.feature_names = feature_names(self.features)
+            self.encoded_names = encoded_feature_names(self.features, TargetEnc)
+        self.input_columns = list(X.columns)
+        self._output_tables = None
+        self._record_tables = None
         return self
 
-    def transform(self, X):
+    def _target_mapping(self):
+        """Computes the smoothed target mean of each ordinal code the same way
+        category_encoders does, but from the accumulated sums and counts.
+        returns (mapping, prior, ordinal mapping of every column)
+        """
+        prior = self.statistics.prior()
+        mapping = {}
+        ordinal = {}
+        if self.engine != 'native':
+            ordinal_index = MappingIndex.from_list(self.encoder.ordinal_encoder.mapping)
+        for col, stats in self.statistics.columns.items():
+            means = smoothed_means(target_sums(stats, self.classes), stats['count'].values, prior,
+                                   self.encoder.min_samples_leaf, self.encoder.smoothing)
+            if self.classes is None:
+                smoothing = pd.Series(means, index=stats.index)
+            else:
+                smoothing = pd.DataFrame(means, index=stats.index, columns=self.classes)
+            # the native lookup tables are built from this mapping, so they cannot provide the codes yet
+            codes = ordinal_mapping(stats.index) if self.engine == 'native' else ordinal_index.get(col)
+            smoothing.index = codes.reindex(stats.index).values
+            smoothing.loc[-1] = prior
+            smoothing.loc[-2] = prior
+            mapping[col] = smoothing
+            ordinal[col] = codes
+        return mapping, prior, ordinal
+
+    def _encode(self, X):
+        """Encodes the encoded columns of X, after grouping their rare categories.
+        returns dict of column name to encoded values
+        """
+        X = group_columns(X, self.groupings)
+        cols = self.encoder.cols
+        if self.engine == 'native':
+            encoded = map_columns(lambda col: self.tables[col].transform(X[col]), cols, self.n_jobs,
+                                  stage='encode', rows=len(X))
+        else:
+            with profile_stage('category_encoders', rows=len(X)):
+                # category_encoders copies every column it is given, so only pass it the encoded ones
+                X_encoded = self.encoder.transform(missing_as_nan_columns(X[cols]))
+                encoded = [X_encoded[col].values for col in cols]
+        return dict(zip(cols, encoded))
+
+    def transform(self, X, copy=True):
         """Encodes matrix and updates features accordingly.
+        If copy is False, the columns that are not encoded share memory with X.
         returns encoded matrix (dataframe)
         """
-        X_new = self.encoder.transform(X)
-        feature_names = []
-        for feature in self.features:
-            for fname in feature.get_feature_names():
-                feature_names.append(fname)
-        X_new.columns = feature_names
-        return X_new
+        encoded = self._encode(X)
+        with profile_stage('replace_columns', rows=len(X)):
+            X_new = replace_columns(X, encoded, self.feature_names, copy)
+        with profile_stage('downcast', rows=len(X)):
+            return downcast_columns(X_new, self.encoded_names, self.dtype)
+
+    def _build_output_tables(self):
+        categories = {col: mapping_categories(mappings[1]) for col, mappings in self.mapping_index.mappings.items()}
+        return output_tables(self._encode, categories, self.dtype)
 
     def fit_transform(self, X, features, y=None):
-        """First fits, then transforms matrix.
+        """First fits, then transforms matrix. With cv, the rows are encoded out of fold.
+        returns encoded matrix (dataframe)
+        """
+        self.fit(X, features, y)
+        if self.cv is None:
+            return self.transform(X)
+        return self._out_of_fold_transform(X, y)
+
+    def _out_of_fold_transform(self, X, y):
+        """Encodes the training rows of each fold with the statistics of the other folds,
+        computed for all folds at once from per-fold sums.
         returns encoded matrix (dataframe)
         """
-        return self.fit(X, features, y).transform(X)
+        if len(X) < self.cv:
+            raise ValueError("cv=%d needs at least as many rows, got %d" % (self.cv, len(X)))
+        X = group_columns(X, self.groupings)
+        targets = target_frame(y, self.classes)
+        y = targets.values[:, :1] if self.classes is None else targets.values
+        folds = fold_ids(len(X), self.cv)
+        # the prior of each row is the target mean, or class frequencies, of the other folds
+        fold_sums = np.stack([np.bincount(folds, weights=target, minlength=self.cv) for target in y.T], axis=1)
+        fold_counts = np.bincount(folds, minlength=self.cv)[:, None]
+        priors = ((y.sum(axis=0) - fold_sums) / (len(y) - fold_counts))[folds]
+
+        def encode_column(col):
+            sums, counts = out_of_fold_sums(X[col], y, folds, self.cv)
+            means = smoothed_means(sums, counts, priors, self.encoder.min_samples_leaf, self.encoder.smoothing)
+            return means if self.classes is not None else means[:, 0]
+
+        encoded = map_columns(encode_column, self.encoder.cols, self.n_jobs, stage='out_of_fold', rows=len(X))
+        with profile_stage('replace_columns', rows=len(X)):
+            X_new = replace_columns(X, dict(zip(self.encoder.cols, encoded)), self.feature_names, True)
+        with profile_stage('downcast', rows=len(X)):
+            return downcast_columns(X_new, self.encoded_names, self.dtype)
 
     def get_mapping(self, category):
-        """Gets the mapping for the target encoder. Only takes strings of the column name, not the index number.
+        """Gets the mapping for the target encoder, by column name or position among the encoded columns.
         returns tuple of dict (mapping, mapping of corresponding ordinal encoder)
         """
-        def mapping_helper(method, category):
-            if isinstance(category, str):
-                for map in method.mapping:
-                    if map['col'] == category:
-                        return map['mapping']
-            return method.mapping[category]['mapping']
+        return self.mapping_index.get(category)
 
-        return self.encoder.mapping[category], mapping_helper(self.encoder.ordinal_encoder, category)
+    def get_mappings(self):
+        """Gets the mappings of all encoded columns.
+        returns dict of column name to tuple (mapping, mapping of corresponding ordinal encoder)
+        """
+        return self.mapping_index.to_dict()
+
+    def get_grouping(self, category):
+        """Gets the grouping of rare categories of an encoded column, by name or position among the encoded columns.
+        returns CategoryGrouping, or None if the column had no rare categories at fit time
+        """
+        if not isinstance(category, str):
+            category = self.mapping_index.columns[category]
+        return self.groupings.get(category)
+
+    def memory_usage(self, deep=True):
+        """Estimates the memory held by the fitted encoder, see sizeof.
+        returns bytes per encoded column and internal structure (pd.Series)
+        """
+        structures = [(col, 'statistics', stats) for col, stats in (self.statistics.columns if self.statistics is not None else {}).items()]
+        structures += [(col, 'grouping', grouping.categories) for col, grouping in self.groupings.items()]
+        structures += [(col, 'mapping', mapping) for col, mapping in self.encoder.mapping.items()]
+        if self.engine == 'native':
+            structures += [(col, 'lookup_table', table) for col, table in self.tables.items()]
+            # the native ordinal mappings are built for the index, the others are shared with category_encoders
+            structures += [(col, 'ordinal_mapping', mappings[1])
+                           for col, mappings in self.mapping_index.mappings.items()]
+        else:
+            structures += mapping_structures(self.encoder.ordinal_encoder.mapping, 'ordinal_mapping')
+        return structure_memory_usage(structures + table_structures(self._output_tables, self._record_tables), deep)
+
+    def strip(self):
+        """Drops the target sums and counts kept to continue fitting with partial_fit and
+        the lookup tables built for single records and saving, which are rebuilt when needed.
+        Transforming and saving keep working, partial_fit needs a new fit first.
+        returns self
+        """
+        self.statistics = None
+        self._output_tables = None
+        self._record_tables = None
+        return self
 
     def encode_features_list(self, X, features):
         feature_list = []
         for f in features:
             if f.get_name() in self.encoder.cols:
-                f = ft.Feature([f], primitive=TargetEnc(self, f.get_name()))
+                f = encoded_feature([f], TargetEnc(self, f.get_name()))
             feature_list.append(f)
         return feature_list
 
+    def get_dtype(self):
+        return self.dtype
+
     def get_features(self):
         return self.features
 
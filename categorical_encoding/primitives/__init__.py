@@ -1,4 +1,5 @@
 # flake8: noqa
+from .batch_enc import BatchEnc
 from .binary_enc import BinaryEnc
 from .hashing_enc import HashingEnc
 from .leave_one_out_enc import LeaveOneOutEnc
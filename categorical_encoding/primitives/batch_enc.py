@@ -0,0 +1,74 @@
+from featuretools.primitives.base.transform_primitive_base import (
+    TransformPrimitive
+)
+from featuretools.variable_types import Categorical, Numeric
+
+from categorical_encoding.utils import (
+    hash_encode,
+    indicator_dtype,
+    profile_stage
+)
+
+
+class BatchEnc(TransformPrimitive):
+    """Applies a fitted encoder to several encoded columns in one call, looking values
+    up in the encoder's output tables instead of deriving mappings per column.
+    Requires an already fitted encoder.
+
+    Parameters:
+        fitted_encoder: encoder
+            Encoder that has already learned encoding mappings from fitting to a data table.
+        columns: [str]
+            names of the encoded columns the primitive is applied to, in the order of its inputs.
+
+    Examples:
+        >>> enc = Encoder(method='ordinal')
+        >>> enc.fit_transform(feature_matrix, features)
+        >>> encoder = BatchEnc(fitted_encoder=enc, columns=['product_id', 'countrycode'])
+        >>> encoded = encoder(['car', 'toothpaste'], ['US', 'AL'])
+        [[2, 3],
+         [1, 2]]
+    """
+    name = "batch_enc"
+    input_types = [Categorical]
+    return_type = Numeric
+
+    def __init__(self, fitted_encoder, columns):
+        method = getattr(fitted_encoder, 'method', fitted_encoder)
+        self.columns = list(columns)
+        self.input_types = [Categorical] * len(self.columns)
+        self.tables = {col: method.output_tables[col] for col in self.columns if col in method.output_tables}
+        if method.get_name() == 'hashing':
+            # hashed columns have no tables and are hashed like in HashingEnc
+            self.hashing = (method.get_hash_method(), method.get_n_components(), indicator_dtype(method.get_dtype()))
+        # output names of every encoded column, in the order the encoder writes them
+        names = {}
+        for f in method.get_features():
+            base = f.base_features[0].get_name() if f.base_features else None
+            if base in self.columns:
+                names.setdefault(base, []).extend(f.get_feature_names())
+        self.output_names = [name for col in self.columns for name in names[col]]
+        self.number_output_features = len(self.output_names)
+
+    def get_function(self):
+        def transform(*columns):
+            with profile_stage(self.name, rows=len(columns[0])):
+                outputs = []
+                for col, values in zip(self.columns, columns):
+                    if col in self.tables:
+                        encoded = self.tables[col].transform(values)
+                    else:
+                        encoded = hash_encode(values, *self.hashing)
+                    outputs.extend(encoded.reshape(len(values), -1).T)
+                if self.number_output_features == 1:
+                    return outputs[0]
+                return outputs
+        return transform
+
+    def generate_name(self, base_feature_names):
+        if self.number_output_features == 1:
+            return self.output_names[0]
+        return u"%s(%s)" % (self.name.upper(), ', '.join(base_feature_names))
+
+    def generate_names(self, base_feature_names):
+        return list(self.output_names)
@@ -4,6 +4,12 @@ from featuretools.primitives.base.transform_primitive_base import (
 )
 from featuretools.variable_types import Categorical, Numeric
 
+from categorical_encoding.utils import (
+    LookupTable,
+    indicator_dtype,
+    profile_stage
+)
+
 
 class BinaryEnc(TransformPrimitive):
     """Applies a fitted Binary Encoder to the values. Requires an already fitted encoder.
@@ -30,18 +36,25 @@ class BinaryEnc(TransformPrimitive):
 
     def __init__(self, fitted_encoder, category):
         self.mapping, self.mapping_ord = fitted_encoder.get_mapping(category)
+        self.grouping = fitted_encoder.get_grouping(category)
         self.n = self.mapping.shape[1]
         self.number_output_features = self.n
 
+        # Dense bit matrix with one row per known category. Missing values seen
+        # during fitting have a positive code and their own row; unseen and
+        # unseen missing values are all zeros.
+        categories = self.mapping_ord[self.mapping_ord > 0]
+        bits = self.mapping.reindex(categories.values, fill_value=0).values
+        zeros = np.zeros(self.n, dtype=bits.dtype)
+        dtype = indicator_dtype(fitted_encoder.get_dtype())
+        self.table = LookupTable(categories.index, bits.astype(dtype), zeros, zeros)
+
     def get_function(self):
         def transform(X):
-            mapped = []
-            if self.mapping_ord is not None:
-                X = X.map(self.mapping_ord)
-            if self.mapping is not None:
-                for value in X:
-                    mapped.append(self.mapping.loc[value].values)
-            return np.swapaxes(mapped, 0, 1)
+            with profile_stage(self.name, rows=len(X)):
+                if self.grouping is not None:
+                    X = self.grouping.group(X)
+                return self.table.transform(X).T
         return transform
 
     def generate_name(self, base_feature_names):
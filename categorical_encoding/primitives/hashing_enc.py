@@ -1,10 +1,14 @@
-import numpy as np
-from category_encoders import HashingEncoder
 from featuretools.primitives.base.transform_primitive_base import (
     TransformPrimitive
 )
 from featuretools.variable_types import Categorical, Numeric
 
+from categorical_encoding.utils import (
+    hash_encode,
+    indicator_dtype,
+    profile_stage
+)
+
 
 class HashingEnc(TransformPrimitive):
     """Applies a Hashing Encoder to the values.
@@ -35,11 +39,12 @@ class HashingEnc(TransformPrimitive):
         self.hash_method = fitted_encoder.get_hash_method()
         self.n = fitted_encoder.get_n_components()
         self.number_output_features = self.n
+        self.dtype = indicator_dtype(fitted_encoder.get_dtype())
 
     def get_function(self):
         def transform(X):
-            new_encoder = HashingEncoder(hash_method=self.hash_method, n_components=self.n)
-            return np.swapaxes(new_encoder.fit_transform(X).values, 0, 1)
+            with profile_stage(self.name, rows=len(X)):
+                return hash_encode(X, self.hash_method, self.n, self.dtype).T
         return transform
 
     def generate_name(self, base_feature_names):
@@ -1,8 +1,17 @@
+import numpy as np
+import pandas as pd
 from featuretools.primitives.base.transform_primitive_base import (
     TransformPrimitive
 )
 from featuretools.variable_types import Categorical, Numeric
 
+from categorical_encoding.utils import (
+    downcast,
+    missing_as_nan,
+    profile_stage,
+    weighted_means
+)
+
 
 class LeaveOneOutEnc(TransformPrimitive):
     """Applies a fitted LeaveOneOut Encoder to the values.
@@ -28,23 +37,42 @@ class LeaveOneOutEnc(TransformPrimitive):
 
     def __init__(self, fitted_encoder, category):
         self.mapping = fitted_encoder.get_mapping(category)
-        total = 0
-        count = 0
-        for index in self.mapping.index:
-            total += self.mapping['sum'][index]
-            count += self.mapping['count'][index]
-        self.global_mean = total / count
+        self.grouping = fitted_encoder.get_grouping(category)
+        self.dtype = fitted_encoder.get_dtype()
+        self.prior_weight = fitted_encoder.get_prior_weight()
+        self.index = pd.Index(self.mapping.index)
+        # a multi-class encoder keeps one sum column per class instead of 'sum'
+        self.multi_class = 'sum' not in self.mapping.columns
+        if self.multi_class:
+            columns = self.classes = self.mapping.columns.drop('count')
+            self.number_output_features = len(self.classes)
+        else:
+            columns = 'sum'
+        sums = self.mapping[columns].values.astype(float)
+        counts = self.mapping['count'].values.astype(float)
+        if self.multi_class:
+            counts = counts[:, None]
+        self.global_mean = sums.sum(axis=0) / counts.sum()
+
+        # Like the encoder, categories seen more than once map to their target mean
+        # weighted with the prior and the others to the global mean, followed by the
+        # global mean for values that were not seen during fitting. They get position -1
+        # from get_indexer and so take the trailing entry.
+        means = weighted_means(sums, counts, self.global_mean, self.prior_weight)
+        means = np.where(counts > 1, means, self.global_mean)
+        self.means = np.concatenate([means, [self.global_mean]])
 
     def get_function(self):
         def transform(X):
-            mapped = []
-            for value in X:
-                if self.mapping['sum'][value] == 0:
-                    mapped.append(self.global_mean)
-                else:
-                    mapped.append(self.mapping['sum'][value] / self.mapping['count'][value])
-            return mapped
+            with profile_stage(self.name, rows=len(X)):
+                if self.grouping is not None:
+                    X = self.grouping.group(X)
+                rows = self.index.get_indexer(missing_as_nan(X))
+                return downcast(self.means.take(rows, axis=0), self.dtype).T
         return transform
 
     def generate_name(self, base_feature_names):
         return u"%s_%s" % (base_feature_names[0].upper(), 'leave_one_out')
+
+    def generate_names(self, base_feature_names):
+        return [u"%s_%s_%s" % (base_feature_names[0].upper(), 'leave_one_out', c) for c in self.classes]
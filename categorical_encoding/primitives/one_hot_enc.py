@@ -4,6 +4,8 @@ from featuretools.primitives.base.transform_primitive_base import (
 )
 from featuretools.variable_types import Categorical, Numeric
 
+from categorical_encoding.utils import indicator_dtype, profile_stage
+
 
 class OneHotEnc(TransformPrimitive):
     """Applies one hot encoding for the specific category value to the column.
@@ -11,6 +13,8 @@ class OneHotEnc(TransformPrimitive):
     Parameters:
         value: str or nan
             The category value.
+        dtype: str or numpy dtype
+            dtype of the encoded column. None keeps int64 and 'auto' uses uint8.
 
     Examples:
         >>> enc = Encoder(method='one_hot')
@@ -23,14 +27,16 @@ class OneHotEnc(TransformPrimitive):
     input_types = [Categorical]
     return_type = [Numeric]
 
-    def __init__(self, value=None):
+    def __init__(self, value=None, dtype=None):
         self.value = value
+        self.dtype = indicator_dtype(dtype)
 
     def get_function(self):
         def transform(X):
-            if pd.isnull(self.value):
-                return pd.isna(X).astype(int)
-            return (pd.Series(X).astype(pd.Series([self.value]).dtype) == self.value).astype(int)
+            with profile_stage(self.name, rows=len(X)):
+                if pd.isnull(self.value):
+                    return pd.isna(X).astype(self.dtype)
+                return (pd.Series(X).astype(pd.Series([self.value]).dtype) == self.value).astype(self.dtype)
         return transform
 
     def generate_name(self, base_feature_names):
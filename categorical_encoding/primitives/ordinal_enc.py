@@ -3,6 +3,8 @@ from featuretools.primitives.base.transform_primitive_base import (
 )
 from featuretools.variable_types import Categorical, Ordinal
 
+from categorical_encoding.utils import downcast, missing_as_nan, profile_stage
+
 
 class OrdinalEnc(TransformPrimitive):
     """Applies a fitted Ordinal Encoder to the values.
@@ -28,12 +30,20 @@ class OrdinalEnc(TransformPrimitive):
 
     def __init__(self, fitted_encoder, category):
         self.mapping = fitted_encoder.get_mapping(category)
+        self.grouping = fitted_encoder.get_grouping(category)
+        self.dtype = fitted_encoder.get_dtype()
 
     def get_function(self):
         def transform(X):
-            if self.mapping is not None:
-                X = X.map(self.mapping)
-            return X
+            with profile_stage(self.name, rows=len(X)):
+                if self.grouping is not None:
+                    X = self.grouping.group(X)
+                if self.mapping is not None:
+                    X = missing_as_nan(X).map(self.mapping)
+                if self.dtype is not None:
+                    # integer dtypes cannot hold NaN, so mark unseen values as -1
+                    X = X.fillna(-1)
+                return downcast(X, self.dtype)
         return transform
 
     def generate_name(self, base_feature_names):
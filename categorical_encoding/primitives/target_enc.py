@@ -1,8 +1,11 @@
+import pandas as pd
 from featuretools.primitives.base.transform_primitive_base import (
     TransformPrimitive
 )
 from featuretools.variable_types import Categorical, Numeric
 
+from categorical_encoding.utils import downcast, missing_as_nan, profile_stage
+
 
 class TargetEnc(TransformPrimitive):
     """Applies a fitted Target Encoder to the values.
@@ -28,11 +31,26 @@ class TargetEnc(TransformPrimitive):
 
     def __init__(self, fitted_encoder, category):
         self.mapping, self.mapping_ord = fitted_encoder.get_mapping(category)
+        self.grouping = fitted_encoder.get_grouping(category)
+        self.dtype = fitted_encoder.get_dtype()
+        # a multi-class encoder maps each code to one smoothed frequency per class
+        self.multi_class = isinstance(self.mapping, pd.DataFrame)
+        if self.multi_class:
+            self.number_output_features = self.mapping.shape[1]
 
     def get_function(self):
         def transform(X):
-            return X.map(self.mapping_ord).map(self.mapping)
+            with profile_stage(self.name, rows=len(X)):
+                if self.grouping is not None:
+                    X = self.grouping.group(X)
+                codes = missing_as_nan(X).map(self.mapping_ord)
+                if self.multi_class:
+                    return downcast(self.mapping.reindex(codes.values).values, self.dtype).T
+                return downcast(codes.map(self.mapping), self.dtype)
         return transform
 
     def generate_name(self, base_feature_names):
         return u"%s_%s" % (base_feature_names[0].upper(), 'target')
+
+    def generate_names(self, base_feature_names):
+        return [u"%s_%s_%s" % (base_feature_names[0].upper(), 'target', c) for c in self.mapping.columns]
@@ -1,12 +1,25 @@
+import pickle
+import threading
+
 import featuretools as ft
 import numpy as np
 import pandas as pd
+import pytest
+from category_encoders import LeaveOneOutEncoder as LeaveOneOut
+from category_encoders import TargetEncoder as Target
+from scipy import sparse
 
 from .testing_utils import create_feature_matrix
 
 from categorical_encoding.encoders import Encoder
-from categorical_encoding.encoders.encoder_methods import OneHotEncoder
+from categorical_encoding.encoders.encoder_methods import (
+    HashingEncoder,
+    OneHotEncoder,
+    TargetEncoder,
+    one_hot_encoder
+)
 from categorical_encoding.primitives import (
+    BatchEnc,
     BinaryEnc,
     HashingEnc,
     LeaveOneOutEnc,
@@ -14,6 +27,12 @@ from categorical_encoding.primitives import (
     OrdinalEnc,
     TargetEnc
 )
+from categorical_encoding.utils import (
+    SpaceSaving,
+    map_columns,
+    murmur3_32,
+    murmur3_32_array
+)
 
 
 def test_ordinal_encoding():
@@ -50,6 +69,12 @@ def test_binary_encoding():
                        [0, 1, 1, 1]]
     assert (encoded == encoded_results).all()
 
+    encoded = encoder(['car', 'bicycle', np.nan])
+    encoded_results = [[0, 0, 0],
+                       [1, 0, 0],
+                       [0, 0, 0]]
+    assert (encoded == encoded_results).all()
+
     product_feature = ft.Feature([f1], primitive=BinaryEnc(enc, 0))
     cc_feature = ft.Feature([f4], primitive=BinaryEnc(enc, 1))
     features = [product_feature, f2, f3, cc_feature]
@@ -174,6 +199,10 @@ def test_leave_one_out_encoding():
     encoded_results = [17.5, 8.33333, 5, 5]
     np.testing.assert_almost_equal(encoded, encoded_results, decimal=4)
 
+    encoded = encoder(['car', 'bicycle', np.nan])
+    encoded_results = [17.5, 8.33333, 8.33333]
+    np.testing.assert_almost_equal(encoded, encoded_results, decimal=4)
+
     product_feature = ft.Feature([f1], primitive=LeaveOneOutEnc(enc, 'product_id'))
     cc_feature = ft.Feature([f4], primitive=LeaveOneOutEnc(enc, 'countrycode'))
     features = [product_feature, f2, f3, cc_feature]
@@ -228,3 +257,809 @@ def test_one_hot_top_n():
             'countrycode = nan': [0, 0]}
     fm_encoded = pd.DataFrame(data, index=[6, 7])
     assert feature_matrix.eq(fm_encoded).all().all()
+
+
+def test_hashing_encoding_fast_hash():
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    assert murmur3_32(b'hello') == 613153351
+    assert murmur3_32(b'', seed=1) == 0x514e28b7
+    assert murmur3_32(b'Hello, world!', seed=1234) == 0xfaf6cdb3
+    data = [b'The quick brown fox jumps over the lazy dog', b'', b'test', b'tes', b'te', b'test']
+    np.testing.assert_array_equal(murmur3_32_array(data, seed=0x9747b28c),
+                                  [murmur3_32(value, seed=0x9747b28c) for value in data])
+    assert murmur3_32_array(data, seed=0x9747b28c)[0] == 0x2fa826cd
+    enc = Encoder(method=HashingEncoder(hash_method='murmur3', n_components=4))
+    fm_encoded = enc.fit_transform(feature_matrix, features)
+    assert fm_encoded.shape == (6, 10)
+    assert enc.get_hash_method() == 'murmur3'
+
+    encoder = HashingEnc(fitted_encoder=enc)
+    encoded = encoder(['car', 'coke zero', 'coke zero', np.nan])
+    assert encoded.shape == (4, 4)
+    assert (encoded.sum(axis=0) == 1).all()
+    assert (encoded[:, 1] == encoded[:, 2]).all()
+
+    features = enc.get_features()
+    feature_matrix = ft.calculate_feature_matrix(features, es, instance_ids=ids)
+    assert (fm_encoded == feature_matrix).all().all()
+
+
+def test_hashing_missing_values():
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    # None is hashed like NaN, as 'nan', where category_encoders left its row all zero
+    feature_matrix['product_id'] = ['car', None, np.nan, 'nan', 'None', 'car']
+    enc = Encoder(method='hashing')
+    fm_encoded = enc.fit_transform(feature_matrix, features)
+    encoded = fm_encoded[[c for c in fm_encoded.columns if c.startswith('PRODUCT_ID')]].values
+    np.testing.assert_array_equal(encoded[1], encoded[3])
+    np.testing.assert_array_equal(encoded[2], encoded[3])
+    assert encoded.sum(axis=1).tolist() == [1] * 6
+    assert not (encoded[1] == encoded[4]).all()
+
+    encoder = HashingEnc(fitted_encoder=enc)
+    np.testing.assert_array_equal(encoder(['car', None, np.nan, 'nan']).T, encoded[[0, 1, 2, 3]])
+    record = feature_matrix.to_dict('records')[1]
+    assert enc.transform_record(record) == fm_encoded.iloc[1].tolist()
+
+
+def test_one_hot_sparse_output():
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    feature_matrix['countrycode'][0] = np.nan
+    dense = Encoder(method='one_hot').fit_transform(feature_matrix, features)
+    enc = Encoder(method='one_hot', output='sparse')
+    fm_encoded = enc.fit_transform(feature_matrix, features)
+
+    assert sparse.isspmatrix_csr(fm_encoded)
+    assert enc.method.get_feature_names() == [f.get_name() for f in enc.get_features()]
+    assert enc.method.get_feature_names() == dense.columns.tolist()
+    np.testing.assert_array_equal(fm_encoded.toarray(), dense.values.astype(float))
+
+    with pytest.raises(ValueError):
+        Encoder(method='ordinal', output='sparse')
+
+
+def test_one_hot_matrix():
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    feature_matrix['countrycode'][0] = np.nan
+    enc = OneHotEncoder(top_n=1)
+    fm_encoded = enc.fit_transform(feature_matrix[['countrycode', 'value', 'product_id']], [f4, f3, f1])
+    data = {'countrycode = US': [0, 1, 1, 1, 1, 0],
+            'countrycode = nan': [1, 0, 0, 0, 0, 1],
+            'value': [0.0, 5.0, 10.0, 15.0, 20.0, 0.0],
+            'product_id = coke zero': [1, 1, 1, 0, 0, 0]}
+    expected = pd.DataFrame(data, index=feature_matrix.index)
+    pd.testing.assert_frame_equal(fm_encoded, expected, check_dtype=False)
+
+    enc = OneHotEncoder(top_n=None)
+    fm_encoded = enc.fit_transform(feature_matrix[['countrycode', 'product_id']], [f4, f1])
+    assert fm_encoded.shape == (6, 6)
+    assert enc.labels == {'countrycode': ['US', 'AL'], 'product_id': ['coke zero', 'car', 'toothpaste']}
+
+
+def test_one_hot_transform_new_data():
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    feature_matrix['countrycode'][0] = np.nan
+    enc = Encoder(method=OneHotEncoder(top_n=2))
+    enc.fit(feature_matrix, features)
+    assert enc.method.matrix is None
+
+    new_data = pd.DataFrame({'product_id': ['car', 'toothpaste', np.nan],
+                             'purchased': [True, False, True],
+                             'value': [1.0, 2.0, 3.0],
+                             'countrycode': ['AL', 'MX', 'US']}, index=[10, 11, 12])
+    fm_encoded = enc.transform(new_data)
+    data = {'product_id = coke zero': [0, 0, 0],
+            'product_id = car': [1, 0, 0],
+            'purchased': [True, False, True],
+            'value': [1.0, 2.0, 3.0],
+            'countrycode = US': [0, 0, 1],
+            'countrycode = AL': [1, 0, 0],
+            'countrycode = nan': [0, 1, 0]}
+    expected = pd.DataFrame(data, index=[10, 11, 12])
+    pd.testing.assert_frame_equal(fm_encoded, expected, check_dtype=False)
+
+    enc = Encoder(method=OneHotEncoder(top_n=2, keep_matrix=True))
+    enc.fit(feature_matrix, features)
+    pd.testing.assert_frame_equal(enc.method.matrix, enc.transform(feature_matrix))
+
+
+@pytest.mark.parametrize("method,expected", [('ordinal', 'int8'),
+                                             ('binary', 'uint8'),
+                                             ('hashing', 'uint8'),
+                                             ('one_hot', 'uint8'),
+                                             ('target', 'float32'),
+                                             ('leave_one_out', 'float32')])
+def test_auto_dtype(method, expected):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    enc = Encoder(method=method, dtype='auto')
+    fm_encoded = enc.fit_transform(feature_matrix, features, feature_matrix['value'])
+    default = Encoder(method=method).fit_transform(feature_matrix, features, feature_matrix['value'])
+    encoded_columns = [c for c in fm_encoded.columns if c not in ('purchased', 'value')]
+    assert (fm_encoded[encoded_columns].dtypes == expected).all()
+    assert fm_encoded['value'].dtype == 'float64'
+    np.testing.assert_allclose(fm_encoded[encoded_columns].values.astype(float),
+                               default[encoded_columns].values.astype(float), rtol=1e-6)
+
+    feature_matrix_new = ft.calculate_feature_matrix(enc.get_features(), es, instance_ids=ids)
+    np.testing.assert_allclose(feature_matrix_new[encoded_columns].values.astype(float),
+                               enc.transform(feature_matrix)[encoded_columns].values.astype(float), rtol=1e-6)
+
+
+@pytest.mark.parametrize("method", ['ordinal', 'binary', 'hashing', 'one_hot', 'target', 'leave_one_out'])
+def test_chunked_transform(method):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    enc = Encoder(method=method, dtype='auto')
+    enc.fit(feature_matrix, features, feature_matrix['value'])
+    fm_encoded = enc.transform(feature_matrix)
+
+    chunks = [feature_matrix.iloc[:2], feature_matrix.iloc[2:5], feature_matrix.iloc[5:]]
+    encoded_chunks = list(enc.transform_iter(iter(chunks)))
+    assert len(encoded_chunks) == 3
+    for encoded in encoded_chunks:
+        pd.testing.assert_series_equal(encoded.dtypes, fm_encoded.dtypes)
+    pd.testing.assert_frame_equal(pd.concat(encoded_chunks), fm_encoded)
+    pd.testing.assert_frame_equal(enc.transform(feature_matrix, chunksize=4), fm_encoded)
+
+
+def test_transform_iter_unseen_values():
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    enc = Encoder(method='ordinal').fit(feature_matrix, features)
+    unseen = feature_matrix.iloc[2:5].copy()
+    unseen.loc[3, 'product_id'] = 'unseen'
+    first, second = enc.transform_iter([feature_matrix.iloc[:2], unseen])
+    # category_encoders gives float codes to a chunk holding unseen values
+    assert enc.transform(unseen)['PRODUCT_ID_ordinal'].dtype == np.float64
+    pd.testing.assert_series_equal(second.dtypes, first.dtypes)
+    assert second['PRODUCT_ID_ordinal'].tolist() == [1, -1, 2]
+
+
+@pytest.mark.parametrize("method", ['ordinal', 'target', 'leave_one_out'])
+def test_partial_fit(method):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    feature_matrix['countrycode'][1] = np.nan
+    y = feature_matrix['value']
+    enc = Encoder(method=method).fit(feature_matrix, features, y)
+
+    enc_partial = Encoder(method=method)
+    for rows in [[0, 1], [2, 3, 4], [5]]:
+        chunk = feature_matrix.iloc[rows]
+        enc_partial.partial_fit(chunk, features, y.iloc[rows])
+
+    pd.testing.assert_frame_equal(enc_partial.transform(feature_matrix), enc.transform(feature_matrix))
+    assert enc_partial.get_features() == enc.get_features()
+
+    with pytest.raises(TypeError):
+        Encoder(method='binary').partial_fit(feature_matrix, features)
+
+
+@pytest.mark.parametrize("method", ['ordinal', 'binary', 'hashing', 'one_hot', 'target', 'leave_one_out'])
+@pytest.mark.parametrize('engine', ['category_encoders', 'native'])
+def test_n_jobs(method, engine):
+    if method == 'hashing' and engine == 'native':
+        pytest.skip('hashing has a single implementation')
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = feature_matrix['value']
+    fm_encoded = Encoder(method=method, engine=engine).fit_transform(feature_matrix, features, y)
+    enc = Encoder(method=method, n_jobs=2, engine=engine)
+    assert enc.method.n_jobs == 2
+    pd.testing.assert_frame_equal(enc.fit_transform(feature_matrix, features, y), fm_encoded)
+
+    assert map_columns(lambda x: x * 2, range(10), n_jobs=-1) == list(range(0, 20, 2))
+
+
+@pytest.mark.parametrize('method', ['ordinal', 'binary', 'one_hot', 'target', 'leave_one_out'])
+def test_native_engine(method):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = feature_matrix['value']
+    enc = Encoder(method=method)
+    native = Encoder(method=method, engine='native')
+    fm_encoded = enc.fit_transform(feature_matrix, features, y)
+    pd.testing.assert_frame_equal(native.fit_transform(feature_matrix, features, y), fm_encoded, check_dtype=False)
+    assert [f.get_name() for f in native.get_features()] == [f.get_name() for f in enc.get_features()]
+
+    new_data = feature_matrix.copy()
+    new_data.iloc[0, 0] = 'unseen'
+    new_data.iloc[1, 0] = np.nan
+    pd.testing.assert_frame_equal(native.transform(new_data), enc.transform(new_data), check_dtype=False)
+
+    with pytest.raises(ValueError, match='Unknown engine'):
+        Encoder(method=method, engine='numba')
+
+
+@pytest.mark.parametrize('method', ['ordinal', 'binary', 'hashing', 'one_hot', 'target', 'leave_one_out'])
+def test_transform_without_copy(method):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = feature_matrix['value']
+    enc = Encoder(method=method)
+    fm_encoded = enc.fit_transform(feature_matrix, features, y)
+    fm_shared = enc.transform(feature_matrix, copy=False)
+    pd.testing.assert_frame_equal(fm_shared, enc.transform(feature_matrix))
+    assert np.shares_memory(fm_shared['value'].values, feature_matrix['value'].values)
+    assert not np.shares_memory(enc.transform(feature_matrix)['value'].values, feature_matrix['value'].values)
+    if method != 'leave_one_out':
+        pd.testing.assert_frame_equal(fm_shared, fm_encoded)
+
+
+@pytest.mark.parametrize('method', ['ordinal', 'binary', 'hashing', 'one_hot', 'target', 'leave_one_out'])
+def test_feature_names_cached(method, monkeypatch):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = feature_matrix['value']
+    enc = Encoder(method=method)
+    fm_encoded = enc.fit_transform(feature_matrix, features, y)
+    assert enc.method.feature_names == fm_encoded.columns.tolist()
+
+    def fail(self):
+        raise AssertionError("feature names should be resolved at fit time")
+    monkeypatch.setattr(ft.feature_base.FeatureBase, 'get_feature_names', fail)
+    assert enc.transform(feature_matrix).columns.tolist() == fm_encoded.columns.tolist()
+
+
+@pytest.mark.parametrize('engine', ['category_encoders', 'native'])
+@pytest.mark.parametrize('method', ['ordinal', 'binary', 'hashing', 'one_hot', 'target', 'leave_one_out'])
+def test_transform_record(method, engine):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = feature_matrix['value']
+    enc = Encoder(method=method, engine=engine)
+    enc.fit(feature_matrix, features, y)
+
+    new_data = feature_matrix.copy()
+    new_data.iloc[0, 0] = 'unseen'
+    new_data.iloc[1, 0] = np.nan
+    records = new_data.to_dict('records')
+    expected = enc.transform(new_data)
+    assert enc.transform_record(records[0]) == expected.iloc[0].tolist()
+    np.testing.assert_allclose(enc.transform_records(records).astype(float), expected.values.astype(float))
+    assert pickle.loads(pickle.dumps(enc)).transform_record(records[0]) == expected.iloc[0].tolist()
+
+
+@pytest.mark.parametrize('method', ['ordinal', 'binary', 'hashing', 'one_hot', 'target', 'leave_one_out'])
+def test_save_load(method, tmpdir):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = feature_matrix['value']
+    enc = Encoder(method=method, dtype='auto')
+    enc.fit(feature_matrix, features, y)
+    path = str(tmpdir.join('encoder'))
+    enc.save(path)
+    loaded = Encoder.load(path)
+
+    new_data = feature_matrix.copy()
+    new_data.iloc[0, 0] = 'unseen'
+    new_data.iloc[1, 0] = np.nan
+    pd.testing.assert_frame_equal(loaded.transform(new_data), enc.transform(new_data))
+    record = new_data.to_dict('records')[0]
+    assert loaded.transform_record(record) == enc.transform_record(record)
+    with pytest.raises(TypeError):
+        loaded.fit(feature_matrix, features, y)
+
+    resaved = str(tmpdir.join('resaved'))
+    loaded.save(resaved)
+    reloaded = Encoder.load(resaved)
+    pd.testing.assert_frame_equal(reloaded.transform(new_data), enc.transform(new_data))
+    assert reloaded.transform_record(record) == enc.transform_record(record)
+
+
+@pytest.mark.parametrize('engine', ['category_encoders', 'native'])
+@pytest.mark.parametrize('method', ['ordinal', 'binary', 'one_hot', 'target', 'leave_one_out', 'hashing'])
+def test_memory_usage_and_strip(method, engine):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = feature_matrix['value']
+    enc = Encoder(method=method, engine=engine)
+    enc.fit(feature_matrix, features, y)
+    expected = enc.transform(feature_matrix)
+
+    # lookup tables for single records are only built on first use or when asked to
+    assert 'record_table' not in enc.memory_usage().index.get_level_values('structure')
+    assert enc.build_record_tables() is enc
+    record = feature_matrix.to_dict('records')[0]
+    assert enc.transform_record(record) == expected.iloc[0].tolist()
+
+    usage = enc.memory_usage()
+    assert usage.index.names == ['column', 'structure']
+    assert (usage > 0).all()
+    encoded = {f.base_features[0].get_name() for f in enc.get_features() if f.base_features}
+    assert set(usage.index.get_level_values('column')) == encoded
+    assert 'record_table' in usage.index.get_level_values('structure')
+    assert usage.sum() >= enc.memory_usage(deep=False).sum()
+
+    assert enc.strip() is enc
+    stripped = enc.memory_usage()
+    assert stripped.sum() < usage.sum()
+    assert 'record_table' not in stripped.index.get_level_values('structure')
+    pd.testing.assert_frame_equal(enc.transform(feature_matrix), expected)
+    assert enc.transform_record(record) == expected.iloc[0].tolist()
+    if method in ['ordinal', 'target', 'leave_one_out']:
+        with pytest.raises(ValueError, match='stripped'):
+            enc.partial_fit(feature_matrix, features, y)
+        enc.fit(feature_matrix, features, y)
+        pd.testing.assert_frame_equal(enc.transform(feature_matrix), expected)
+
+
+@pytest.mark.parametrize('engine', ['category_encoders', 'native'])
+def test_profile(engine):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = feature_matrix['value']
+    enc = Encoder(method='target', engine=engine)
+    with pytest.raises(ValueError, match='Nothing was profiled'):
+        enc.stats()
+    records = []
+    with enc.profile(callback=records.append, memory=True):
+        enc.fit(feature_matrix, features, y)
+        enc.transform(feature_matrix, chunksize=4)
+        ft.calculate_feature_matrix(enc.get_features(), es, instance_ids=ids)
+    enc.transform(feature_matrix)
+
+    stats = enc.stats()
+    assert stats['calls'].sum() == len(records)
+    assert stats.loc[('fit', 'total', ''), 'rows'] == len(feature_matrix)
+    assert stats.loc[('transform', 'total', ''), 'calls'] == 1
+    assert stats.loc[('transform', 'replace_columns', ''), 'calls'] == 2
+    assert stats.loc[('', 'target_enc', ''), 'calls'] == 2
+    stage = 'encode' if engine == 'native' else 'category_encoders'
+    columns = [column for operation, name, column in stats.index if operation == 'transform' and name == stage]
+    assert set(columns) == ({'product_id', 'countrycode'} if engine == 'native' else {''})
+    assert all(record['bytes'] is not None for record in records)
+
+
+def test_profile_nested_and_per_encoder():
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    enc1 = Encoder(method='ordinal', engine='native', n_jobs=2).fit(feature_matrix, features)
+    enc2 = Encoder(method='binary').fit(feature_matrix, features)
+    with enc1.profile():
+        enc1.transform(feature_matrix)
+        with enc2.profile():
+            enc2.transform(feature_matrix)
+            enc1.transform(feature_matrix)
+        enc1.transform(feature_matrix)
+        # work of other threads is not recorded
+        thread = threading.Thread(target=enc1.transform, args=(feature_matrix,))
+        thread.start()
+        thread.join()
+    enc1.transform(feature_matrix)
+
+    stats1 = enc1.stats()
+    assert stats1.loc[('transform', 'total', ''), 'calls'] == 3
+    assert set(stats1.loc['transform'].index.get_level_values('column')) == {'', 'product_id', 'countrycode'}
+    stats2 = enc2.stats()
+    assert stats2.loc[('transform', 'total', ''), 'calls'] == 1
+    assert stats2.loc[('transform', 'category_encoders', ''), 'calls'] == 1
+
+
+@pytest.mark.parametrize('engine', ['category_encoders', 'native'])
+@pytest.mark.parametrize('method', ['ordinal', 'binary', 'target', 'leave_one_out'])
+def test_rare_category_grouping(method, engine):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = feature_matrix['value']
+    enc = Encoder(method=method, engine=engine, min_frequency=2)
+    enc.fit(feature_matrix, features, y)
+    grouping = enc.get_grouping('product_id')
+    assert list(grouping.categories) == ['coke zero', 'car']
+    assert list(enc.get_grouping('countrycode').categories) == ['US']
+    assert Encoder(method=method, engine=engine).fit(feature_matrix, features, y).get_grouping(0) is None
+
+    fm_encoded = enc.transform(feature_matrix)
+    feature_matrix_new = ft.calculate_feature_matrix(enc.get_features(), es, instance_ids=ids)
+    np.testing.assert_allclose(feature_matrix_new.values.astype(float), fm_encoded.values.astype(float))
+
+    # 'toothpaste' and 'AL' are seen once, so they share the 'other' encoding with unseen values
+    new_data = feature_matrix.copy()
+    new_data.iloc[0, 0] = 'unseen'
+    new_data.iloc[0, 3] = 'unseen'
+    encoded = enc.transform(new_data)
+    rare = feature_matrix.index.get_loc(5)
+    assert encoded.iloc[0].tolist() == encoded.iloc[rare].tolist()
+    assert enc.transform_record(new_data.to_dict('records')[0]) == encoded.iloc[0].tolist()
+
+    with_max = Encoder(method=method, engine=engine, max_categories=1).fit(feature_matrix, features, y)
+    assert list(with_max.get_grouping('product_id').categories) == ['coke zero']
+
+    # countrycode has no rare category within two categories, so unseen values stay unknown
+    with_two = Encoder(method=method, engine=engine, max_categories=2).fit(feature_matrix, features, y)
+    assert with_two.get_grouping(0) is with_two.get_grouping('product_id')
+    assert with_two.get_grouping('countrycode') is None
+    plain = Encoder(method=method, engine=engine).fit(feature_matrix, features, y)
+    cols = [c for c in plain.transform(new_data).columns if c.startswith('COUNTRYCODE')]
+    pd.testing.assert_frame_equal(with_two.transform(new_data)[cols], plain.transform(new_data)[cols])
+    if method in ['ordinal', 'target', 'leave_one_out']:
+        with pytest.raises(ValueError, match='Use fit instead'):
+            enc.partial_fit(feature_matrix, features, y)
+
+
+@pytest.mark.parametrize('method', ['ordinal', 'binary', 'one_hot', 'target', 'leave_one_out'])
+def test_rare_category_grouping_keeps_input(method):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    # a copy holds the categorical columns in one block, which a grouping must not write into
+    feature_matrix = feature_matrix.copy()
+    original = feature_matrix.copy()
+    y = feature_matrix['value']
+    enc = Encoder(method=method, min_frequency=2)
+    enc.fit(feature_matrix, features, y)
+    pd.testing.assert_frame_equal(feature_matrix, original)
+    enc.transform(feature_matrix)
+    pd.testing.assert_frame_equal(feature_matrix, original)
+    enc.fit_transform(feature_matrix, features, y)
+    pd.testing.assert_frame_equal(feature_matrix, original)
+    if method == 'target':
+        Encoder(method=method, min_frequency=2, cv=2).fit_transform(feature_matrix, features, y)
+        pd.testing.assert_frame_equal(feature_matrix, original)
+
+
+def test_rare_category_grouping_options():
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    enc = Encoder(method='one_hot', min_frequency=0.4)
+    fm_encoded = enc.fit_transform(feature_matrix, features)
+    assert list(fm_encoded.columns) == ['product_id = coke zero', 'purchased', 'value', 'countrycode = US']
+    with pytest.raises(ValueError, match='not supported by the hashing'):
+        Encoder(method='hashing', min_frequency=2)
+    with pytest.raises(ValueError, match='min_frequency'):
+        Encoder(method='ordinal', min_frequency=0)
+    with pytest.raises(ValueError, match='max_categories'):
+        Encoder(method='ordinal', max_categories=0.5)
+
+
+@pytest.mark.parametrize('engine', ['category_encoders', 'native'])
+def test_one_hot_sketches(engine):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    feature_matrix['countrycode'][1] = np.nan
+    expected = Encoder(method='one_hot', engine=engine).fit_transform(feature_matrix, features)
+    enc = Encoder(method='one_hot', engine=engine, sketch_error=0.5)
+    pd.testing.assert_frame_equal(enc.fit_transform(feature_matrix, features), expected)
+
+    for sketch_error in [None, 0.5]:
+        enc_partial = Encoder(method='one_hot', engine=engine, sketch_error=sketch_error)
+        for rows in [[0, 1], [2, 3, 4], [5]]:
+            enc_partial.partial_fit(feature_matrix.iloc[rows], features)
+        pd.testing.assert_frame_equal(enc_partial.transform(feature_matrix), expected)
+        assert 'sketch' in enc_partial.memory_usage().index.get_level_values('structure')
+        with pytest.raises(ValueError, match='no value counts'):
+            enc_partial.strip().partial_fit(feature_matrix, features)
+    with pytest.raises(ValueError, match='sketch_error'):
+        Encoder(method='ordinal', sketch_error=0.1)
+    with pytest.raises(ValueError, match='sketch_error'):
+        Encoder(method='one_hot', sketch_error=2)
+
+
+@pytest.mark.parametrize('engine', ['category_encoders', 'native'])
+def test_one_hot_sketches_bound_fit(engine, monkeypatch):
+    # fit counts two rows at a time into sketches of four values
+    monkeypatch.setattr(one_hot_encoder, 'SKETCH_CHUNK_ROWS', 2)
+    values = list('ababcadbeafbgahbab')
+    feature_matrix = pd.DataFrame({'letter': values, 'value': np.arange(len(values), dtype=float)})
+    es = ft.EntitySet().entity_from_dataframe('letters', feature_matrix.reset_index(), index='index')
+    features = ft.dfs(entityset=es, target_entity='letters', max_depth=1, features_only=True)
+
+    enc = OneHotEncoder(top_n=2, engine=engine, sketch_error=0.25)
+    enc.fit(feature_matrix, features)
+    sketch = enc.sketches['letter']
+    assert sketch.n_rows == len(values)
+    assert len(sketch.counts) == 4
+    assert enc.labels['letter'] == ['a', 'b']
+    if engine == 'category_encoders':
+        # the category_encoders mapping is fitted on the values the sketch keeps, not on every value
+        assert len(enc.get_mapping('letter').columns) == 4
+    expected = OneHotEncoder(top_n=2, engine=engine).fit_transform(feature_matrix, features)
+    pd.testing.assert_frame_equal(enc.transform(feature_matrix), expected)
+
+
+def test_space_saving():
+    values = pd.Series(np.repeat(['a', 'b', 'c', 'd', 'e'], [50, 30, 10, 5, 5]))
+    values = values.sample(frac=1, random_state=0)
+    sketch = SpaceSaving(capacity=3)
+    for start in range(0, len(values), 7):
+        sketch.update(values.iloc[start:start + 7])
+    assert sketch.n_rows == 100
+    assert list(sketch.top(2)) == ['a', 'b']
+    assert len(sketch.counts) == 3
+    # counts are never underestimated and overestimated by at most n_rows / capacity
+    true_counts = values.value_counts()
+    for value, count in sketch.counts.items():
+        assert true_counts[value] <= count <= true_counts[value] + sketch.error_bound()
+    assert sketch.error_bound() <= sketch.n_rows / sketch.capacity
+
+    merged = SpaceSaving(capacity=3).update(values.iloc[:50]).merge(SpaceSaving(capacity=3).update(values.iloc[50:]))
+    assert list(merged.top(2)) == ['a', 'b']
+    exact = SpaceSaving().update(values.tolist() + [np.nan])
+    assert exact.counts.to_dict() == true_counts.to_dict()
+    assert exact.n_missing == 1 and exact.error_bound() == 0
+
+
+@pytest.mark.parametrize('engine', ['category_encoders', 'native'])
+def test_target_encoding_cv(engine):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    feature_matrix['countrycode'][1] = np.nan
+    y = feature_matrix['value']
+    enc = Encoder(method='target', engine=engine, cv=3)
+    fm_encoded = enc.fit_transform(feature_matrix, features, y)
+    expected = Encoder(method='target', engine=engine).fit(feature_matrix, features, y)
+    pd.testing.assert_frame_equal(enc.transform(feature_matrix), expected.transform(feature_matrix))
+
+    # each fold is encoded like by an encoder refitted on the other folds
+    for fold in [[0, 1], [2, 3], [4, 5]]:
+        rest = [row for row in range(len(feature_matrix)) if row not in fold]
+        fold_enc = Encoder(method='target', engine=engine)
+        fold_enc.fit(feature_matrix.iloc[rest], features, y.iloc[rest])
+        pd.testing.assert_frame_equal(fm_encoded.iloc[fold], fold_enc.transform(feature_matrix.iloc[fold]))
+
+    with pytest.raises(ValueError, match='cv'):
+        Encoder(method='target', cv=1)
+    with pytest.raises(ValueError, match='cv'):
+        Encoder(method='ordinal', cv=3)
+    with pytest.raises(ValueError, match='cv=3'):
+        enc.fit_transform(feature_matrix.iloc[:2], features, y.iloc[:2])
+
+
+@pytest.mark.parametrize('engine', ['category_encoders', 'native'])
+def test_leave_one_out_fit_transform(engine):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    # a repeated and a singleton missing value next to singleton and repeated categories
+    feature_matrix['countrycode'][1] = np.nan
+    feature_matrix['countrycode'][2] = np.nan
+    feature_matrix['product_id'][0] = np.nan
+    y = feature_matrix['value']
+    cols = ['product_id', 'countrycode']
+    expected = LeaveOneOut(cols=cols).fit_transform(feature_matrix[cols], y)
+
+    fm_encoded = Encoder(method='leave_one_out', engine=engine).fit_transform(feature_matrix, features, y)
+    np.testing.assert_allclose(fm_encoded[['PRODUCT_ID_leave_one_out', 'COUNTRYCODE_leave_one_out']].values,
+                               expected.values)
+
+
+def test_leave_one_out_prior_weight():
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = feature_matrix['value']
+    enc = Encoder(method='leave_one_out', engine='native', prior_weight=2)
+    fm_encoded = enc.fit_transform(feature_matrix, features, y)
+    assert enc.get_prior_weight() == 2
+
+    # the prior counts like two more rows in every category seen more than once
+    prior = y.mean()
+    codes = feature_matrix['product_id']
+    sums = y.groupby(codes).transform('sum')
+    counts = codes.map(codes.value_counts())
+    expected = np.where(counts > 1, (sums - y + 2 * prior) / (counts - 1 + 2), prior)
+    np.testing.assert_allclose(fm_encoded['PRODUCT_ID_leave_one_out'], expected)
+    expected = np.where(counts > 1, (sums + 2 * prior) / (counts + 2), prior)
+    encoded = enc.transform(feature_matrix)
+    np.testing.assert_allclose(encoded['PRODUCT_ID_leave_one_out'], expected)
+    feature_matrix_new = ft.calculate_feature_matrix(enc.get_features(), es, instance_ids=ids)
+    np.testing.assert_allclose(feature_matrix_new.values.astype(float), encoded.values.astype(float))
+
+    # without a weight the means are those of category_encoders
+    unweighted = Encoder(method='leave_one_out', engine='native', prior_weight=0)
+    pd.testing.assert_frame_equal(unweighted.fit_transform(feature_matrix, features, y),
+                                  Encoder(method='leave_one_out').fit_transform(feature_matrix, features, y))
+    with pytest.raises(ValueError, match='native engine'):
+        Encoder(method='leave_one_out', prior_weight=1)
+    with pytest.raises(ValueError, match='prior_weight must be'):
+        Encoder(method='leave_one_out', engine='native', prior_weight=-1)
+    with pytest.raises(ValueError, match='only supported by the leave_one_out'):
+        Encoder(method='target', prior_weight=1)
+
+
+def test_target_smoothing_options():
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = feature_matrix['value']
+    cols = ['product_id', 'countrycode']
+    expected = Target(cols=cols, smoothing=5.0, min_samples_leaf=3).fit_transform(feature_matrix[cols], y)
+    for engine in ['category_encoders', 'native']:
+        enc = Encoder(method='target', engine=engine, smoothing=5.0, min_samples_leaf=3)
+        fm_encoded = enc.fit_transform(feature_matrix, features, y)
+        np.testing.assert_allclose(fm_encoded[['PRODUCT_ID_target', 'COUNTRYCODE_target']].values, expected.values)
+    with pytest.raises(ValueError, match='only supported by the target'):
+        Encoder(method='leave_one_out', smoothing=2.0)
+
+
+@pytest.mark.parametrize('method', [HashingEncoder, TargetEncoder])
+def test_options_ignored_for_encoder_instances(method):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = feature_matrix['value']
+    # options that only apply to method names neither raise nor change an encoder instance
+    enc = Encoder(method=method(), sketch_error=0.1, cv=3, multi_class=True, smoothing=5.0,
+                  min_samples_leaf=3, prior_weight=1)
+    pd.testing.assert_frame_equal(enc.fit_transform(feature_matrix, features, y),
+                                  Encoder(method=method()).fit_transform(feature_matrix, features, y))
+
+
+@pytest.mark.parametrize('multi_class', [False, True])
+def test_leave_one_out_mapping_shares_statistics(multi_class):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = pd.Series(['a', 'b', 'a', 'c', 'c', 'b'], index=feature_matrix.index)
+    if not multi_class:
+        y = (y == 'a').astype(float)
+    enc = Encoder(method='leave_one_out', engine='native', multi_class=multi_class)
+    enc.fit(feature_matrix, features, y)
+    stats = enc.method.statistics.columns['product_id']
+    mapping = enc.get_mapping('product_id')
+    assert 'sum_squares' not in mapping.columns
+    assert np.shares_memory(mapping['count'].values, stats['count'].values)
+
+    encoded = enc.transform(feature_matrix)
+    enc.strip()
+    assert enc.get_mapping('product_id') is mapping
+    pd.testing.assert_frame_equal(enc.transform(feature_matrix), encoded)
+
+
+@pytest.mark.parametrize('method', ['target', 'leave_one_out'])
+def test_multi_class_target(method, tmpdir):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = pd.Series(['a', 'b', 'a', 'c', 'c', 'b'], index=feature_matrix.index)
+    enc = Encoder(method=method, engine='native', multi_class=True)
+    fm_encoded = enc.fit_transform(feature_matrix, features, y)
+    name = 'PRODUCT_ID_%s' % method
+    assert [c for c in fm_encoded.columns if c.startswith(name)] == [name + '_a', name + '_b', name + '_c']
+    assert fm_encoded.shape[1] == 2 + 2 * 3
+
+    # every class is encoded like a numeric target indicating that class
+    for label in ['a', 'b', 'c']:
+        binary = Encoder(method=method, engine='native').fit_transform(feature_matrix, features,
+                                                                       (y == label).astype(float))
+        for col in ['PRODUCT_ID', 'COUNTRYCODE']:
+            np.testing.assert_allclose(fm_encoded['%s_%s_%s' % (col, method, label)],
+                                       binary['%s_%s' % (col, method)])
+
+    encoded = enc.transform(feature_matrix)
+    assert enc.transform_record(feature_matrix.to_dict('records')[0]) == encoded.iloc[0].tolist()
+    feature_matrix_new = ft.calculate_feature_matrix(enc.get_features(), es, instance_ids=ids)
+    np.testing.assert_allclose(feature_matrix_new.values.astype(float), encoded.values.astype(float))
+    enc.save(str(tmpdir))
+    pd.testing.assert_frame_equal(Encoder.load(str(tmpdir)).transform(feature_matrix), encoded)
+
+    # classes are in the same order whichever chunk they first appear in
+    for chunks in [[[0, 1], [2, 3, 4], [5]], [[1, 5], [0, 2, 3, 4]]]:
+        enc_partial = Encoder(method=method, engine='native', multi_class=True)
+        for rows in chunks:
+            enc_partial.partial_fit(feature_matrix.iloc[rows], features, y.iloc[rows])
+        pd.testing.assert_frame_equal(enc_partial.transform(feature_matrix), encoded)
+
+    with pytest.raises(ValueError, match='native'):
+        Encoder(method=method, multi_class=True)
+    with pytest.raises(ValueError, match='multi_class'):
+        Encoder(method='ordinal', multi_class=True)
+
+
+def test_target_smoothing():
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = feature_matrix['value']
+    cols = ['product_id', 'countrycode']
+    for engine in ['category_encoders', 'native']:
+        enc = TargetEncoder(engine=engine, smoothing=10.0, min_samples_leaf=3)
+        encoded = enc.fit_transform(feature_matrix, features, y)
+        expected = Target(cols=cols, smoothing=10.0, min_samples_leaf=3).fit_transform(feature_matrix[cols], y)
+        np.testing.assert_allclose(encoded[['PRODUCT_ID_target', 'COUNTRYCODE_target']].values, expected.values)
+
+
+@pytest.mark.parametrize('method', ['ordinal', 'binary', 'hashing', 'one_hot', 'target', 'leave_one_out'])
+def test_batch_features(method):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    y = feature_matrix['value']
+    enc = Encoder(method=method, dtype='auto').fit(feature_matrix, features, y)
+    fm_encoded = enc.transform(feature_matrix)
+    batch_features = enc.get_features(batch=True)
+    assert len(batch_features) == 3
+    assert isinstance(batch_features[0].primitive, BatchEnc)
+
+    with enc.profile():
+        feature_matrix_new = ft.calculate_feature_matrix(batch_features, es, instance_ids=ids)
+    assert enc.stats().loc[('', 'batch_enc', ''), 'calls'] == 1
+    pd.testing.assert_frame_equal(feature_matrix_new[fm_encoded.columns], fm_encoded, check_dtype=False)
+    assert enc.get_features(batch=False) == enc.get_features()
+
+
+@pytest.mark.parametrize('method', ['ordinal', 'binary', 'one_hot', 'target', 'leave_one_out'])
+@pytest.mark.parametrize('engine', ['category_encoders', 'native'])
+def test_get_mappings(method, engine):
+    if method == 'one_hot' and engine == 'native':
+        pytest.skip('the native one-hot engine has no category_encoders mappings')
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    enc = Encoder(method=method, engine=engine).fit(feature_matrix, features, feature_matrix['value'])
+    mappings = enc.get_mappings()
+    # positions follow the encoded columns, not the order of a dict
+    assert enc.method.mapping_index.columns == [f.get_name() for f in features if f.get_name() in mappings]
+    assert 'product_id' in mappings
+    for position, col in enumerate(mappings):
+        assert enc.get_mapping(col) is mappings[col]
+        assert enc.get_mapping(position) is mappings[col]
+
+
+@pytest.mark.parametrize('engine', ['category_encoders', 'native'])
+def test_leave_one_out_features(engine):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    # a singleton category with a nonzero target and a repeated category with an all-zero target
+    y = pd.Series([0, 0, 0, 0, 0, 1], index=feature_matrix.index)
+    enc = Encoder(method='leave_one_out', engine=engine).fit(feature_matrix, features, y)
+    fm_encoded = enc.transform(feature_matrix)
+    np.testing.assert_allclose(fm_encoded['PRODUCT_ID_leave_one_out'], [0, 0, 0, 0, 0, 1 / 6])
+
+    feature_matrix_new = ft.calculate_feature_matrix(enc.get_features(), es, instance_ids=ids)
+    pd.testing.assert_frame_equal(feature_matrix_new, fm_encoded, check_dtype=False)
+
+
+@pytest.mark.parametrize('method,dtype', [('ordinal', 'uint8'),
+                                          ('ordinal', 'bool'),
+                                          ('target', 'int32'),
+                                          ('leave_one_out', 'uint8')])
+def test_dtype_cannot_hold_values(method, dtype):
+    with pytest.raises(ValueError, match='dtype %s cannot hold' % dtype):
+        Encoder(method=method, dtype=dtype)
+
+
+def test_ordinal_dtype_range():
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    feature_matrix = pd.concat([feature_matrix] * 25, ignore_index=True)
+    feature_matrix['product_id'] = ['product %d' % i for i in range(len(feature_matrix))]
+    enc = Encoder(method='ordinal', dtype='int8')
+    with pytest.raises(ValueError, match='cannot hold the codes from -2 to 150'):
+        enc.fit(feature_matrix, features)
+    fm_encoded = Encoder(method='ordinal', dtype='int16').fit_transform(feature_matrix, features)
+    assert fm_encoded['PRODUCT_ID_ordinal'].tolist() == list(range(1, 151))
+
+
+@pytest.mark.parametrize('method', ['ordinal', 'binary', 'target', 'leave_one_out'])
+def test_mixed_missing_values(method, tmpdir):
+    feature_matrix, features, f1, f2, f3, f4, es, ids = create_feature_matrix()
+
+    # None and NaN are both missing values and form one category
+    log = es['log'].df
+    log['product_id'] = log['product_id'].astype(object)
+    log.loc[[0, 4], 'product_id'] = None
+    log.loc[1, 'product_id'] = np.nan
+    feature_matrix = ft.calculate_feature_matrix(features, es, instance_ids=ids)
+    y = pd.Series([1, 2, 4, 8, 16, 32], index=feature_matrix.index)
+    new_data = feature_matrix.copy()
+    new_data['product_id'] = pd.Series([np.nan, None, 'car', 'bicycle', None, 'coke zero'], index=new_data.index,
+                                       dtype=object)
+
+    results = []
+    for engine in ['category_encoders', 'native']:
+        enc = Encoder(method=method, engine=engine).fit(feature_matrix, features, y)
+        fm_encoded = enc.transform(feature_matrix)
+        for features_new in [enc.get_features(), enc.get_features(batch=True)]:
+            feature_matrix_new = ft.calculate_feature_matrix(features_new, es, instance_ids=ids)
+            pd.testing.assert_frame_equal(feature_matrix_new[fm_encoded.columns], fm_encoded, check_dtype=False)
+
+        encoded = enc.transform(new_data)
+        records = enc.transform_records(new_data.to_dict('records'))
+        np.testing.assert_allclose(records.astype(float), encoded.values.astype(float))
+        enc.save(str(tmpdir.join(engine)))
+        loaded = Encoder.load(str(tmpdir.join(engine)))
+        pd.testing.assert_frame_equal(loaded.transform(new_data), encoded, check_dtype=False)
+        results.append((fm_encoded, encoded))
+
+    for ce_encoded, native_encoded in zip(*results):
+        pd.testing.assert_frame_equal(native_encoded, ce_encoded, check_dtype=False)
+    if method == 'ordinal':
+        assert results[0][0]['PRODUCT_ID_ordinal'].tolist() == [1, 1, 2, 3, 1, 4]
+        assert results[0][1]['PRODUCT_ID_ordinal'].tolist() == [1, 1, 3, -1, 1, 2]
@@ -0,0 +1,68 @@
+# flake8: noqa
+from .dtypes import (
+    check_dtype,
+    check_integer_range,
+    downcast,
+    downcast_columns,
+    encoded_feature_names,
+    feature_names,
+    indicator_dtype,
+    integer_dtype,
+    is_auto_dtype
+)
+from .features import encoded_feature
+from .frames import (
+    missing_as_nan,
+    missing_as_nan_columns,
+    replace_columns,
+    with_columns
+)
+from .grouping import (
+    CategoryGrouping,
+    check_grouping,
+    fit_groupings,
+    frequent_categories,
+    group_columns
+)
+from .hashing import (
+    get_hash_function,
+    hash_bucket,
+    hash_buckets,
+    hash_encode,
+    hash_record_table,
+    murmur3_32,
+    murmur3_32_array
+)
+from .lookup import (
+    LookupTable,
+    MappingIndex,
+    RecordTable,
+    check_engine,
+    encode_record,
+    mapping_categories,
+    ordinal_mapping,
+    output_tables
+)
+from .memory import (
+    mapping_structures,
+    sizeof,
+    structure_memory_usage,
+    table_structures
+)
+from .parallel import effective_n_jobs, map_columns
+from .profiling import Profiler, profile_operation, profile_stage
+from .sketches import SpaceSaving
+from .statistics import (
+    TargetStatistics,
+    category_codes,
+    category_frame,
+    fold_ids,
+    group_sums,
+    merge_categories,
+    merge_group_sums,
+    out_of_fold_sums,
+    smoothed_means,
+    target_frame,
+    target_sums,
+    weighted_means
+)
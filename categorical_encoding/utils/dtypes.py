@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+
+def is_auto_dtype(dtype):
+    """Checks if dtype is 'auto'. Comparing a numpy dtype to a string it cannot parse
+    raises a TypeError on older numpy, so only strings are compared.
+    returns bool
+    """
+    return isinstance(dtype, str) and dtype == 'auto'
+
+
+def indicator_dtype(dtype):
+    """Gets the dtype used for 0/1 indicator outputs.
+    returns numpy dtype
+    """
+    if dtype is None:
+        return np.dtype(int)
+    if is_auto_dtype(dtype):
+        return np.dtype(np.uint8)
+    return np.dtype(dtype)
+
+
+def downcast(values, dtype):
+    """Casts encoded values (array or series) to dtype.
+    'auto' picks the smallest integer type that holds the values, or float32 for floats.
+    None leaves the values unchanged.
+    returns cast values
+    """
+    if dtype is None:
+        return values
+    if not is_auto_dtype(dtype):
+        return values.astype(dtype)
+    kind = np.asarray(values).dtype.kind
+    if kind == 'f':
+        return values.astype(np.float32)
+    if kind in 'iu':
+        if len(values) and values.min() < 0:
+            return pd.to_numeric(values, downcast='integer')
+        return pd.to_numeric(values, downcast='unsigned')
+    return values
+
+
+def check_dtype(dtype, kinds, values):
+    """Raises a ValueError if dtype is not None, 'auto' or a dtype of one of kinds
+    (NumPy kind characters), the kinds that can hold the encoded values described by values.
+    """
+    if dtype is None or is_auto_dtype(dtype):
+        return
+    if np.dtype(dtype).kind not in kinds:
+        raise ValueError("dtype %s cannot hold %s" % (np.dtype(dtype).name, values))
+
+
+def check_integer_range(dtype, low, high):
+    """Raises a ValueError if dtype is an integer dtype not holding every value from low to high."""
+    if dtype is None or is_auto_dtype(dtype) or np.dtype(dtype).kind not in 'iu':
+        return
+    info = np.iinfo(dtype)
+    if low < info.min or high > info.max:
+        raise ValueError("dtype %s cannot hold the codes from %d to %d" % (np.dtype(dtype).name, low, high))
+
+
+def integer_dtype(low, high):
+    """Gets the smallest integer dtype holding every value from low to high.
+    returns numpy dtype
+    """
+    candidates = [np.uint8, np.uint16, np.uint32, np.uint64] if low >= 0 else [np.int8, np.int16, np.int32, np.int64]
+    for candidate in candidates:
+        if np.iinfo(candidate).min <= low and high <= np.iinfo(candidate).max:
+            return np.dtype(candidate)
+    return np.dtype(candidates[-1])
+
+
+def downcast_columns(X, names, dtype):
+    """Casts the named columns of a dataframe the encoder owns to dtype.
+    returns dataframe
+    """
+    if dtype is None:
+        return X
+    for name in names:
+        X[name] = downcast(X[name], dtype)
+    return X
+
+
+def feature_names(features):
+    """Gets the output column names of the features, in order.
+    returns [str]
+    """
+    return [name for f in features for name in f.get_feature_names()]
+
+
+def encoded_feature_names(features, primitive):
+    """Gets the output column names of the features built with the given encoding primitive.
+    returns [str]
+    """
+    return [name for f in features if isinstance(f.primitive, primitive) for name in f.get_feature_names()]
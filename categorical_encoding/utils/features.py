@@ -0,0 +1,18 @@
+import featuretools as ft
+
+
+def encoded_feature(base_features, primitive):
+    """Builds the feature applying primitive to base_features. The output names of a
+    primitive with several outputs come from its generate_names, which featuretools
+    before 0.13 does not call, naming the outputs NAME[i] instead, so they are set on
+    the feature here.
+    returns feature
+    """
+    feature = ft.Feature(base_features, primitive=primitive)
+    if primitive.number_output_features > 1:
+        names = primitive.generate_names([f.get_name() for f in base_features])
+        if hasattr(feature, 'set_feature_names'):
+            feature.set_feature_names(names)
+        else:
+            feature._names = names
+    return feature
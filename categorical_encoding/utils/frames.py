@@ -0,0 +1,82 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+def missing_as_nan(values):
+    """Replaces None in an object column by NaN, so all missing values match the NaN
+    category learned at fit time. A series without None is returned as it is.
+    returns pd.Series
+    """
+    if not isinstance(values, pd.Series):
+        values = pd.Series(values)
+    if values.dtype != object:
+        return values
+    missing = values.isnull()
+    if not missing.any():
+        return values
+    return values.where(~missing, np.nan)
+
+
+def with_columns(X, columns):
+    """Builds a frame like X with the columns in columns set to new values. The other
+    columns share memory with X and X is left unchanged: assigning to a column of a
+    shallow copy would write into the block it shares with X on older pandas, so the
+    column is deleted and the new values are inserted in its place instead.
+    returns dataframe
+    """
+    X_new = X.copy(deep=False)
+    for col, values in columns.items():
+        loc = X_new.columns.get_loc(col)
+        del X_new[col]
+        X_new.insert(loc, col, values)
+    return X_new
+
+
+def missing_as_nan_columns(X):
+    """Applies missing_as_nan to every column of a dataframe. Columns without None
+    are shared with X, which is returned as it is if no column holds None.
+    returns dataframe
+    """
+    X_new = X
+    for col in X.columns:
+        column = X[col]
+        values = missing_as_nan(column)
+        if values is not column:
+            if X_new is X:
+                X_new = X.copy(deep=False)
+            X_new[col] = values
+    return X_new
+
+
+def replace_columns(X, encoded, names, copy=True):
+    """Builds an encoded matrix from X. Columns with an entry in encoded are replaced
+    by their encoded values and the other columns are passed through. Output columns
+    are set to names.
+    If copy is False, the passed through columns share memory with X and only the
+    encoded columns are allocated.
+    returns dataframe
+    """
+    # Columns are replaced from right to left and addressed by position, which
+    # keeps the positions still to be replaced valid and tolerates duplicate names.
+    # Deleting a column splits its block without copying, so a shallow copy keeps
+    # sharing the blocks of X and only the inserted encoded columns are new.
+    # Temporary integer labels keep pandas from re-inferring an object index on every insert.
+    X_new = X.copy(deep=copy)
+    X_new.columns = range(X.shape[1])
+    label = X.shape[1]
+    with warnings.catch_warnings():
+        # every inserted column is its own block, which pandas reports as fragmentation
+        warnings.simplefilter('ignore', pd.errors.PerformanceWarning)
+        for loc in reversed(range(X.shape[1])):
+            col = X.columns[loc]
+            if col not in encoded:
+                continue
+            values = np.asarray(encoded[col]).reshape(len(X), -1)
+            del X_new[loc]
+            for i in reversed(range(values.shape[1])):
+                X_new.insert(loc, label, values[:, i])
+                label += 1
+    X_new.columns = names
+    return X_new
@@ -0,0 +1,97 @@
+import numbers
+
+import pandas as pd
+
+from .frames import with_columns
+
+
+class CategoryGrouping():
+    """Replaces the values of a column outside its frequent categories with one
+    'other' category. Missing values are kept as they are.
+
+    Parameters:
+        categories: pd.Index
+            frequent categories, kept as they are.
+        other: str
+            category the other values are replaced with.
+    """
+
+    def __init__(self, categories, other):
+        self.categories = pd.Index(categories)
+        self.other = other
+
+    def group(self, values):
+        """Groups the values outside the frequent categories, including values that
+        were not seen during fitting.
+        returns pd.Series
+        """
+        values = pd.Series(values)
+        rare = ~values.isin(self.categories) & values.notnull()
+        if not rare.any():
+            return values
+        return values.astype(object).where(~rare, self.other)
+
+
+def check_grouping(min_frequency, max_categories):
+    """Raises a ValueError if min_frequency or max_categories is out of range."""
+    if min_frequency is not None:
+        if isinstance(min_frequency, numbers.Integral):
+            valid = min_frequency >= 1
+        else:
+            valid = isinstance(min_frequency, numbers.Real) and 0 < min_frequency < 1
+        if not valid:
+            raise ValueError("min_frequency must be a count of at least 1 or a fraction between 0 and 1, "
+                             "got %r" % (min_frequency,))
+    if max_categories is not None and (not isinstance(max_categories, numbers.Integral) or max_categories < 1):
+        raise ValueError("max_categories must be an integer of at least 1, got %r" % (max_categories,))
+
+
+def frequent_categories(counts, n_rows, min_frequency=None, max_categories=None):
+    """Selects the categories seen at least min_frequency times (a count, or a fraction
+    of n_rows if below 1), keeping at most the max_categories most frequent.
+
+    Parameters:
+        counts: pd.Series
+            number of rows of each category, ordered by descending count.
+        n_rows: int
+            number of rows the categories were counted in.
+
+    returns categories ordered by descending count (pd.Index)
+    """
+    if min_frequency is not None:
+        threshold = min_frequency if min_frequency >= 1 else min_frequency * n_rows
+        counts = counts[counts.values >= threshold]
+    if max_categories is not None:
+        counts = counts.iloc[:max_categories]
+    return counts.index
+
+
+def fit_groupings(X, cols, min_frequency=None, max_categories=None):
+    """Finds the frequent categories of every column in cols with one value_counts
+    pass per column. Missing values are not counted. Columns whose categories are
+    all frequent need no grouping and are left out.
+    returns dict of column name to CategoryGrouping
+    """
+    if min_frequency is None and max_categories is None:
+        return {}
+    groupings = {}
+    for col in cols:
+        counts = X[col].value_counts(dropna=True)
+        categories = frequent_categories(counts, len(X), min_frequency, max_categories)
+        if len(categories) == len(counts):
+            continue
+        other = '__other__'
+        while other in categories:
+            other += '_'
+        groupings[col] = CategoryGrouping(categories, other)
+    return groupings
+
+
+def group_columns(X, groupings):
+    """Applies the groupings to the columns of X in a new frame, leaving X unchanged.
+    The other columns are shared with X.
+    returns dataframe
+    """
+    if not groupings:
+        return X
+    return with_columns(X, {col: grouping.group(X[col]).values for col, grouping in groupings.items()})
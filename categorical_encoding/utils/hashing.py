@@ -0,0 +1,156 @@
+import hashlib
+import zlib
+from functools import lru_cache, partial
+
+import numpy as np
+import pandas as pd
+
+from .lookup import RecordTable
+
+MASK_32 = 0xffffffff
+
+
+def murmur3_32(data, seed=0):
+    """Computes the 32-bit MurmurHash3 (x86 variant) of a bytes object.
+    returns hash value (int)
+    """
+    return int(murmur3_32_array([data], seed)[0])
+
+
+def murmur3_32_array(data, seed=0):
+    """Computes the 32-bit MurmurHash3 (x86 variant) of every bytes object in data.
+    Values of the same length are hashed together with NumPy uint32 arithmetic,
+    so the cost is a few array operations per distinct length and 4-byte block.
+    returns hash values (np.ndarray of uint32)
+    """
+    lengths = np.fromiter(map(len, data), dtype=np.int64, count=len(data))
+    order = np.argsort(lengths, kind='stable')
+    lengths = lengths[order]
+    buffer = np.frombuffer(b''.join([data[i] for i in order]), dtype=np.uint8)
+    hashes = np.empty(len(data), dtype=np.uint32)
+    bounds = np.append(np.flatnonzero(np.diff(lengths, prepend=-1)), len(data))
+    offset = 0
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        length = lengths[start]
+        rows = buffer[offset:offset + (end - start) * length].reshape(end - start, length)
+        hashes[order[start:end]] = _murmur3_32_rows(rows, seed)
+        offset += (end - start) * length
+    return hashes
+
+
+def _rotate_left(values, bits):
+    return (values << np.uint32(bits)) | (values >> np.uint32(32 - bits))
+
+
+def _mix(k):
+    k = k * np.uint32(0xcc9e2d51)
+    return _rotate_left(k, 15) * np.uint32(0x1b873593)
+
+
+def _murmur3_32_rows(rows, seed):
+    """Hashes the rows of a 2-D uint8 array, one value of equal length per row.
+    returns np.ndarray of uint32
+    """
+    n_rows, length = rows.shape
+    h = np.full(n_rows, seed & MASK_32, dtype=np.uint32)
+    n_blocks = length // 4
+    if n_blocks:
+        blocks = np.ascontiguousarray(rows[:, :n_blocks * 4]).view('<u4')
+        for i in range(n_blocks):
+            h ^= _mix(blocks[:, i])
+            h = _rotate_left(h, 13) * np.uint32(5) + np.uint32(0xe6546b64)
+    tail = rows[:, n_blocks * 4:].astype(np.uint32)
+    if tail.shape[1]:
+        k = np.zeros(n_rows, dtype=np.uint32)
+        for i in range(tail.shape[1]):
+            k ^= tail[:, i] << np.uint32(8 * i)
+        h ^= _mix(k)
+    h ^= np.uint32(length & MASK_32)
+    h ^= h >> np.uint32(16)
+    h *= np.uint32(0x85ebca6b)
+    h ^= h >> np.uint32(13)
+    h *= np.uint32(0xc2b2ae35)
+    h ^= h >> np.uint32(16)
+    return h
+
+
+NON_CRYPTOGRAPHIC_HASHES = {'murmur3': murmur3_32,
+                            'crc32': zlib.crc32,
+                            'adler32': zlib.adler32}
+
+# hashes computed for many values at once, in one call returning an array
+ARRAY_HASHES = {'murmur3': murmur3_32_array}
+
+
+@lru_cache(maxsize=None)
+def get_hash_function(hash_method):
+    """Gets a function mapping bytes to a non-negative integer hash.
+    Supports 'murmur3', 'crc32', 'adler32' and any method from hashlib.
+    returns hash function (callable)
+    """
+    if hash_method in NON_CRYPTOGRAPHIC_HASHES:
+        return NON_CRYPTOGRAPHIC_HASHES[hash_method]
+    try:
+        hashlib.new(hash_method)
+    except (ValueError, TypeError):
+        raise ValueError("Hashing method '%s' is not available. Use one of %s or a method from hashlib."
+                         % (hash_method, list(NON_CRYPTOGRAPHIC_HASHES.keys())))
+
+    def hash_function(data):
+        return int(hashlib.new(hash_method, data).hexdigest(), 16)
+    return hash_function
+
+
+def hash_bucket(value, hash_function, n_components):
+    """Gets the column a single value is hashed to. Values are hashed through
+    their string form, so missing values hash as 'nan'.
+    returns column index (int)
+    """
+    return hash_function(str(value).encode('utf-8')) % n_components
+
+
+def hash_buckets(values, hash_method, n_components):
+    """Gets the column every value is hashed to, like hash_bucket. Hashes in
+    ARRAY_HASHES hash all values in one call.
+    returns column indices (np.ndarray)
+    """
+    data = [str(value).encode('utf-8') for value in values]
+    if hash_method in ARRAY_HASHES:
+        return ARRAY_HASHES[hash_method](data).astype(np.int64) % n_components
+    hash_function = get_hash_function(hash_method)
+    return np.array([hash_function(value) % n_components for value in data], dtype=np.int64)
+
+
+def hash_encode(values, hash_method='md5', n_components=8, dtype=np.int64):
+    """Applies the hashing trick to a column of values. Each distinct value is
+    hashed only once and the result is broadcast back to the rows. Missing
+    values, None and NaN alike, are hashed as the string 'nan', while
+    category_encoders leaves the rows holding None all zero.
+    returns encoded array of shape (len(values), n_components)
+    """
+    codes, uniques = pd.factorize(values)
+    # factorize marks missing values with -1, which selects the trailing 'nan' bucket
+    columns = hash_buckets(list(uniques) + [np.nan], hash_method, n_components).take(codes)
+
+    encoded = np.zeros((len(codes), n_components), dtype=dtype)
+    encoded[np.arange(len(codes)), columns] = 1
+    return encoded
+
+
+def hash_indicators(hash_method, n_components, value):
+    """Hashes a single value to a tuple of n_components indicators.
+    returns tuple
+    """
+    outputs = [0] * n_components
+    outputs[hash_bucket(value, get_hash_function(hash_method), n_components)] = 1
+    return tuple(outputs)
+
+
+def hash_record_table(hash_method, n_components):
+    """Builds the lookup table for scoring single records with the hashing trick.
+    Values cannot be listed in advance, so each one is hashed when it is looked up.
+    returns RecordTable
+    """
+    # a partial of a module-level function keeps fitted encoders picklable
+    encode = partial(hash_indicators, hash_method, n_components)
+    return RecordTable({}, encode, encode(np.nan))
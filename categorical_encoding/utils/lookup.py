@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+
+from .dtypes import downcast
+from .statistics import category_frame
+
+
+class LookupTable():
+    """Maps category values to rows of a precomputed output table.
+
+    Parameters:
+        categories: list or pd.Index
+            categories learned during fitting. May include NaN if missing values were seen.
+        values: np.ndarray
+            one output value (or row of values) per category.
+        unknown: scalar or np.ndarray
+            output for values that were not seen during fitting.
+        missing: scalar or np.ndarray
+            output for missing values, if they were not seen during fitting.
+    """
+
+    def __init__(self, categories, values, unknown, missing):
+        self.categories = pd.Index(categories)
+        values = np.asarray(values)
+        self.table = np.concatenate([values, np.asarray([unknown], dtype=values.dtype),
+                                     np.asarray([missing], dtype=values.dtype)])
+        self._set_rows()
+
+    @classmethod
+    def from_table(cls, categories, table):
+        """Builds a lookup table from a complete output table: one row per category
+        followed by the unknown and missing rows. The table is used as is, so it can
+        be a memory-mapped array.
+        returns LookupTable
+        """
+        lookup = cls.__new__(cls)
+        lookup.categories = pd.Index(categories)
+        lookup.table = table
+        lookup._set_rows()
+        return lookup
+
+    def _set_rows(self):
+        self.unknown_row = len(self.categories)
+        self.missing_row = self.unknown_row + 1
+        if self.categories.hasnans:
+            # missing values seen during fitting, None or NaN, take the row of the NaN category
+            self.missing_row = int(np.flatnonzero(self.categories.isnull())[0])
+
+    def record_table(self):
+        """Converts the table to plain dicts and tuples for scoring single records.
+        returns RecordTable
+        """
+        rows = [tuple(row) for row in self.table.reshape(len(self.table), -1).tolist()]
+        outputs = {category: row for category, row in zip(self.categories, rows) if not pd.isnull(category)}
+        return RecordTable(outputs, rows[self.unknown_row], rows[self.missing_row])
+
+    def rows(self, values):
+        """Gets the table row of every value.
+        returns np.ndarray of row positions
+        """
+        values = pd.Series(values)
+        rows = self.categories.get_indexer(values)
+        # only values without a match need to be checked for missing values
+        unmatched = np.flatnonzero(rows == -1)
+        if len(unmatched):
+            missing = pd.isnull(values.values[unmatched])
+            rows[unmatched] = np.where(missing, self.missing_row, self.unknown_row)
+        return rows
+
+    def transform(self, values):
+        """Looks up the output of every value.
+        returns np.ndarray of shape (len(values),) or (len(values), width)
+        """
+        return self.table[self.rows(values)]
+
+
+def ordinal_mapping(categories):
+    """Builds an ordinal mapping in the format of category_encoders: categories are
+    numbered from 1 in first-seen order and unseen missing values map to -2.
+    returns pd.Series
+    """
+    categories = pd.Index(categories)
+    mapping = pd.Series(np.arange(1, len(categories) + 1), index=categories)
+    if not categories.hasnans:
+        mapping.loc[np.nan] = -2
+    return mapping
+
+
+class MappingIndex():
+    """Indexes the mapping of every encoded column by column name. It is built once
+    at fit time, so getting the mapping of a column, as every encoding primitive does,
+    takes constant time instead of scanning the mappings of category_encoders.
+
+    Parameters:
+        mappings: iterable of (column name, mapping) pairs
+            mappings in the order of the encoded columns, which gives the positions
+            of the columns. The order is taken from the pairs, not from a dict, as
+            dicts do not keep their insertion order on Python 3.5.
+    """
+
+    def __init__(self, mappings):
+        pairs = list(mappings)
+        self.mappings = dict(pairs)
+        self.columns = [col for col, _ in pairs]
+
+    @classmethod
+    def from_list(cls, mapping):
+        """Indexes a category_encoders mapping, a list of dicts with 'col' and 'mapping' keys.
+        returns MappingIndex
+        """
+        return cls((entry['col'], entry['mapping']) for entry in mapping)
+
+    def get(self, category):
+        """Gets the mapping of a column by name, or by position among the encoded columns.
+        returns mapping
+        """
+        if not isinstance(category, str):
+            category = self.columns[category]
+        return self.mappings[category]
+
+    def to_dict(self):
+        """Gets the mappings of all encoded columns.
+        returns dict of column name to mapping
+        """
+        return dict(self.mappings)
+
+
+ENGINES = ['category_encoders', 'native']
+
+
+def check_engine(engine):
+    """Raises a ValueError if engine is not a supported encoding engine."""
+    if engine not in ENGINES:
+        raise ValueError("Unknown engine '%s'. Use one of %s." % (engine, ENGINES))
+
+
+class RecordTable():
+    """Maps single values to tuples of encoded outputs with plain dict lookups,
+    for scoring one record at a time without building a dataframe.
+
+    Parameters:
+        outputs: dict
+            maps every known, non-missing category to its tuple of outputs.
+        unknown: tuple or callable
+            outputs for values that are not in outputs, or a function computing them from the value.
+        missing: tuple
+            outputs for missing values (None or NaN).
+    """
+
+    def __init__(self, outputs, unknown, missing):
+        self.outputs = outputs
+        self.unknown = unknown
+        self.missing = missing
+
+    def lookup(self, value):
+        """Gets the encoded outputs of a single value.
+        returns tuple
+        """
+        try:
+            return self.outputs[value]
+        except (KeyError, TypeError):
+            pass
+        if pd.isnull(value):
+            return self.missing
+        if callable(self.unknown):
+            return self.unknown(value)
+        return self.unknown
+
+
+def output_tables(encode, categories, dtype):
+    """Builds a LookupTable with the exact outputs of encode for every encoded
+    column, by encoding a small frame that lists the categories of each column,
+    followed by an unknown and a missing value.
+
+    Parameters:
+        encode: callable
+            function encoding a dataframe of the encoded columns, returning a dict
+            of column name to encoded values.
+        categories: dict
+            categories of each encoded column.
+        dtype: str or numpy dtype
+            dtype of the outputs, see downcast.
+
+    returns dict of column name to LookupTable
+    """
+    unknown = '__unknown__'
+    while any(unknown in set(values) for values in categories.values()):
+        unknown += '_'
+    frame = category_frame(categories)
+    extra = pd.DataFrame({col: [unknown, np.nan] for col in categories}, columns=list(categories), dtype=object)
+    # the unknown and missing rows are encoded separately, as category_encoders
+    # returns floats for a whole column once it holds an unknown value
+    encoded = encode(frame)
+    encoded_extra = encode(extra)
+
+    tables = {}
+    for col, values in categories.items():
+        outputs = np.asarray(encoded[col]).reshape(len(frame), -1)
+        # like transform, every output column is cast on its own
+        outputs = np.column_stack([downcast(output, dtype) for output in outputs.T])
+        extra_outputs = np.asarray(encoded_extra[col]).reshape(2, -1).astype(outputs.dtype)
+        # category_frame pads short columns, so only the first rows hold the categories
+        table = np.concatenate([outputs[:len(values)], extra_outputs])
+        tables[col] = LookupTable.from_table(values, table)
+    return tables
+
+
+def mapping_categories(mapping):
+    """Gets the categories of an ordinal mapping in the order of their codes,
+    leaving out the code of missing values that were not seen during fitting.
+    returns pd.Index
+    """
+    mapping = mapping[mapping.values > 0]
+    return mapping.index[np.argsort(mapping.values, kind='stable')]
+
+
+def encode_record(record, columns, tables):
+    """Encodes a single record, a dict of column name to value. Columns with a
+    RecordTable are replaced by their outputs and the others are passed through.
+    returns list of values
+    """
+    values = []
+    for col in columns:
+        table = tables.get(col)
+        if table is None:
+            values.append(record[col])
+        else:
+            values.extend(table.lookup(record[col]))
+    return values
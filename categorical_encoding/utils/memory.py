@@ -0,0 +1,69 @@
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from .lookup import LookupTable, RecordTable
+
+
+def sizeof(obj, deep=True):
+    """Estimates the bytes held by a fitted structure: pandas objects, NumPy arrays,
+    sparse matrices, lookup tables and plain containers. Memory-mapped arrays are
+    counted in full, although the operating system shares them between processes.
+    If deep is False, the values inside object columns and containers are not followed.
+    returns bytes (int)
+    """
+    if obj is None:
+        return 0
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=deep).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=deep))
+    if isinstance(obj, pd.Index):
+        return int(obj.memory_usage(deep=deep))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if sparse.issparse(obj):
+        obj = obj.tocsr()
+        return int(obj.data.nbytes + obj.indices.nbytes + obj.indptr.nbytes)
+    if isinstance(obj, LookupTable):
+        return sizeof(obj.categories, deep) + sizeof(obj.table, deep)
+    if isinstance(obj, RecordTable):
+        return sizeof(obj.outputs, deep) + sizeof(obj.unknown, deep) + sizeof(obj.missing, deep)
+    size = sys.getsizeof(obj)
+    if deep and isinstance(obj, dict):
+        size += sum(sizeof(key, deep) + sizeof(value, deep) for key, value in obj.items())
+    elif deep and isinstance(obj, (list, tuple)):
+        size += sum(sizeof(value, deep) for value in obj)
+    return size
+
+
+def mapping_structures(mapping, structure):
+    """Lists the per-column entries of a category_encoders mapping, a list of
+    dicts with 'col' and 'mapping' keys, as (column, structure, object).
+    returns list
+    """
+    return [(entry['col'], structure, entry['mapping']) for entry in mapping or []]
+
+
+def table_structures(output_tables, record_tables):
+    """Lists the output and record tables of an encoder method as (column, structure, object).
+    Tables that are built on first use are only listed once built.
+    returns list
+    """
+    structures = [(col, 'output_table', table) for col, table in (output_tables or {}).items()]
+    return structures + [(col, 'record_table', table) for col, table in (record_tables or {}).items()]
+
+
+def structure_memory_usage(structures, deep=True):
+    """Sizes the fitted structures of an encoder, given as (column, structure, object).
+    Structures shared by all columns use None as column. Structures that share memory,
+    like a lookup table built from the fitted categories, are each counted in full.
+    returns bytes per column and structure (pd.Series)
+    """
+    structures = [(col, structure, obj) for col, structure, obj in structures if obj is not None]
+    index = pd.MultiIndex.from_arrays([[col for col, _, _ in structures],
+                                       [structure for _, structure, _ in structures]],
+                                      names=['column', 'structure'])
+    return pd.Series([sizeof(obj, deep) for _, _, obj in structures], index=index, dtype='int64')
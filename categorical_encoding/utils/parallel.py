@@ -0,0 +1,40 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .profiling import profile_stage, profiling_state, run_with_profiling_state
+
+
+def effective_n_jobs(n_jobs):
+    """Gets the number of workers for n_jobs. None means 1 and negative values
+    count back from the number of CPUs (-1 uses all of them).
+    returns number of workers (int)
+    """
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(os.cpu_count() + 1 + n_jobs, 1)
+    return max(n_jobs, 1)
+
+
+def _profiled(func, stage, rows, col):
+    with profile_stage(stage, column=col, rows=rows):
+        return func(col)
+
+
+def map_columns(func, columns, n_jobs=None, stage=None, rows=None):
+    """Applies func to every column, fanning out to a thread pool when n_jobs allows.
+    Results are returned in the order of columns regardless of completion order.
+    If stage is given, an active Profiler records every call with its column and rows.
+    returns [result]
+    """
+    columns = list(columns)
+    if stage is not None:
+        func = partial(_profiled, func, stage, rows)
+    n_workers = min(effective_n_jobs(n_jobs), len(columns))
+    if n_workers <= 1:
+        return [func(col) for col in columns]
+    # profiler state is per thread, so every call runs with the profilers of the calling thread
+    state = profiling_state()
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        return list(executor.map(partial(run_with_profiling_state, state, func), columns))
@@ -0,0 +1,192 @@
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+# per thread, the profilers collecting records, innermost last, and the operation the
+# records belong to with its encoder. Workers of map_columns are handed the state of
+# the calling thread with profiling_state, so they record into the same profilers.
+_state = threading.local()
+
+
+def _active():
+    return getattr(_state, 'profilers', ())
+
+
+def _operation():
+    return getattr(_state, 'operation', (None, None))
+
+
+class Profiler():
+    """Records the time spent in every stage of fitting and transforming while it is
+    entered as a context manager. Stages are recorded for the encoders and encoding
+    primitives used inside the block in the same thread, per column where
+    the work is done per column. Profilers can be nested, and all entered profilers
+    record the stages of the inner blocks.
+
+    Parameters:
+        callback: callable
+            called with every record as it is made, a dict with operation, stage,
+            column, rows, seconds and bytes. defaults to None, which only collects records.
+        memory: bool
+            if True, also traces the net bytes allocated in every stage with tracemalloc,
+            which slows the profiled code down. Stages running on threads (n_jobs)
+            see each other's allocations. defaults to False.
+        owner: object
+            if given, operations of other encoders are not recorded. Work outside encoder
+            operations, like encoding primitives computed by featuretools, is always
+            recorded. defaults to None, which records every encoder.
+    """
+
+    def __init__(self, callback=None, memory=False, owner=None):
+        self.callback = callback
+        self.memory = memory
+        self.owner = owner
+        self.records = []
+        self._tracing = False
+        self._previous = []
+
+    def __enter__(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._previous.append(_active())
+        _state.profilers = _active() + (self,)
+        return self
+
+    def __exit__(self, *exc):
+        # restores the profilers that were active before this block
+        _state.profilers = self._previous.pop()
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        return False
+
+    def record(self, operation, owner, stage, column, rows, seconds, allocated):
+        if self.owner is not None and owner is not None and owner is not self.owner:
+            return
+        record = {'operation': operation, 'stage': stage, 'column': column, 'rows': rows,
+                  'seconds': seconds, 'bytes': allocated if self.memory else None}
+        self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def stats(self):
+        """Sums the records per operation, stage and column, slowest first. Stages nest,
+        so the 'total' of an operation includes the stages inside it.
+        returns dataframe with calls, rows, seconds and bytes columns
+        """
+        columns = ['operation', 'stage', 'column', 'rows', 'seconds', 'bytes']
+        records = pd.DataFrame(self.records, columns=columns)
+        keys = ['operation', 'stage', 'column']
+        # operations and columns are None for work outside Encoder calls or not tied to a column
+        records[keys] = records[keys].fillna('')
+        records[['rows', 'bytes']] = records[['rows', 'bytes']].astype(float)
+        grouped = records.groupby(keys, sort=False)
+        stats = grouped[['rows', 'seconds', 'bytes']].sum(min_count=1)
+        stats.insert(0, 'calls', grouped.size())
+        return stats.sort_values('seconds', ascending=False)
+
+
+class _Stage():
+    """Times one stage and records it with the active profilers on exit."""
+
+    def __init__(self, profilers, stage, column, rows):
+        self.profilers = profilers
+        self.stage = stage
+        self.column = column
+        self.rows = rows
+
+    def __enter__(self):
+        tracing = tracemalloc.is_tracing() and any(profiler.memory for profiler in self.profilers)
+        self.allocated = tracemalloc.get_traced_memory()[0] if tracing else None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        allocated = None
+        if self.allocated is not None:
+            allocated = tracemalloc.get_traced_memory()[0] - self.allocated
+        operation, owner = _operation()
+        for profiler in self.profilers:
+            profiler.record(operation, owner, self.stage, self.column, self.rows, seconds, allocated)
+        return False
+
+
+class _Operation():
+    """Sets the operation and encoder of the records made inside it and records its total time."""
+
+    def __init__(self, profilers, operation, owner, rows):
+        self.profilers = profilers
+        self.operation = operation
+        self.owner = owner
+        self.rows = rows
+
+    def __enter__(self):
+        self.previous = _operation()
+        _state.operation = (self.operation, self.owner)
+        self.total = _Stage(self.profilers, 'total', None, self.rows).__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self.total.__exit__(*exc)
+        _state.operation = self.previous
+        return False
+
+
+class _NullStage():
+    """Does nothing, used when no profiler is active."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def profile_stage(stage, column=None, rows=None):
+    """Times a stage with the active profilers. Without one, this is a shared no-op
+    context manager, so instrumented code pays one function call per stage.
+    returns context manager
+    """
+    profilers = _active()
+    if not profilers:
+        return _NULL_STAGE
+    return _Stage(profilers, stage, column, rows)
+
+
+def profile_operation(operation, rows=None, owner=None):
+    """Marks the records made inside it as part of an encoder operation like 'fit'
+    done by owner, the encoder, so profilers of other encoders can leave them out.
+    returns context manager
+    """
+    profilers = _active()
+    if not profilers:
+        return _NULL_STAGE
+    return _Operation(profilers, operation, owner, rows)
+
+
+def profiling_state():
+    """Gets the active profilers and operation of the calling thread, to hand to
+    work done for it on other threads with run_with_profiling_state.
+    returns state (tuple)
+    """
+    return _active(), _operation()
+
+
+def run_with_profiling_state(state, func, *args):
+    """Calls func with the profilers and operation of state active in this thread,
+    then restores the ones that were active before.
+    returns the result of func
+    """
+    previous = profiling_state()
+    _state.profilers, _state.operation = state
+    try:
+        return func(*args)
+    finally:
+        _state.profilers, _state.operation = previous
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+
+class SpaceSaving():
+    """Space-Saving sketch counting the most frequent values of a stream with at most
+    capacity counters. Counts are overestimated by at most n_rows / capacity, so every
+    value seen more often than that is kept, and the overestimate of each kept value
+    is tracked in errors. Sketches of separate chunks or workers can be merged.
+    Missing values are only counted in n_missing.
+
+    Parameters:
+        capacity: int
+            number of values to keep counts of. defaults to None, which counts every value exactly.
+    """
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity
+        self.counts = pd.Series([], dtype='int64')
+        self.errors = pd.Series([], dtype='int64')
+        self.n_rows = 0
+        self.n_missing = 0
+
+    def update(self, values):
+        """Counts a chunk of values. The chunk is counted exactly in one pass and
+        merged into the sketch, so memory is bounded by capacity plus the distinct
+        values of the chunk.
+        returns self
+        """
+        codes, uniques = pd.factorize(pd.Series(values))
+        counts = np.bincount(codes[codes != -1], minlength=len(uniques))
+        chunk = SpaceSaving()
+        chunk.counts = pd.Series(counts, index=pd.Index(uniques), dtype='int64')
+        chunk.errors = pd.Series(0, index=chunk.counts.index, dtype='int64')
+        chunk.n_rows = len(codes)
+        chunk.n_missing = int((codes == -1).sum())
+        return self.merge(chunk)
+
+    def merge(self, other):
+        """Adds the counts of another sketch. A value missing from a full sketch may
+        have been counted up to its smallest count, so that count is added instead.
+        returns self
+        """
+        minimum, other_minimum = self._minimum(), other._minimum()
+        new = other.counts.index[~other.counts.index.isin(self.counts.index)]
+        index = self.counts.index.append(new)
+        counts = self.counts.reindex(index, fill_value=minimum) + other.counts.reindex(index, fill_value=other_minimum)
+        errors = self.errors.reindex(index, fill_value=minimum) + other.errors.reindex(index, fill_value=other_minimum)
+        # a stable sort keeps ties in first-seen order
+        order = np.argsort(-counts.values, kind='stable')
+        if self.capacity is not None:
+            order = order[:self.capacity]
+        self.counts = counts.iloc[order]
+        self.errors = errors.iloc[order]
+        self.n_rows += other.n_rows
+        self.n_missing += other.n_missing
+        return self
+
+    def _minimum(self):
+        # only a sketch that has dropped values undercounts the values it does not hold
+        if self.capacity is None or len(self.counts) < self.capacity:
+            return 0
+        return int(self.counts.iloc[-1])
+
+    def top(self, n=None):
+        """Gets the n values with the highest counts, or all kept values.
+        returns values ordered by descending count (pd.Index)
+        """
+        return self.counts.index[:n]
+
+    def error_bound(self):
+        """Gets the largest possible overestimate of any count in the sketch.
+        returns count (int)
+        """
+        return int(self.errors.max()) if len(self.errors) else 0
@@ -0,0 +1,226 @@
+import numpy as np
+import pandas as pd
+
+from .parallel import map_columns
+
+
+def merge_categories(categories, values):
+    """Appends the values that are not yet in categories, keeping first-seen order.
+    Missing values, None and NaN alike, are one NaN category, like in group_sums.
+    returns categories (pd.Index)
+    """
+    new = pd.Index(pd.unique(values))
+    if new.hasnans:
+        # pd.unique keeps None and NaN apart, so keep the first of them and make it NaN
+        missing = new.isnull()
+        keep = ~missing
+        keep[missing.argmax()] = True
+        new = new[keep]
+        new = new.where(new.notnull(), np.nan)
+    if categories is None:
+        return new
+    return categories.append(new[~new.isin(categories)])
+
+
+def target_frame(y, classes=None):
+    """Builds the target columns summed per category by group_sums. A numeric target
+    gives a 'sum' column. With classes, the target holds class
+    labels and every class gets an indicator column named by its position in classes.
+    returns dataframe
+    """
+    if classes is None:
+        y = np.asarray(y, dtype=float)
+        return pd.DataFrame({'sum': y})
+    codes = pd.Index(classes).get_indexer(np.asarray(y))
+    return pd.DataFrame((codes[:, None] == np.arange(len(classes))).astype(float))
+
+
+def group_sums(values, targets):
+    """Computes the sum of every target column and the row count of each category from
+    one factorization, so the statistics of all targets or classes cost one pass over the column.
+    Categories are in first-seen order and missing values, None and NaN alike, form their own group.
+
+    Parameters:
+        values: pd.Series or np.ndarray
+            categories of the rows.
+        targets: dataframe
+            target columns built by target_frame, aligned with values by position.
+
+    returns dataframe with one column per target column and a 'count' column
+    """
+    codes, categories = pd.factorize(np.asarray(values))
+    categories = pd.Index(categories)
+    missing = codes == -1
+    if missing.any():
+        # factorize drops missing values, so give them the code of their first-seen position
+        first = missing.argmax()
+        position = codes[:first].max() + 1 if first > 0 else 0
+        codes = np.where(codes >= position, codes + 1, codes)
+        codes[missing] = position
+        categories = categories.insert(position, np.nan)
+    n_categories = len(categories)
+    sums = pd.DataFrame({col: np.bincount(codes, weights=targets[col].values, minlength=n_categories)
+                         for col in targets.columns},
+                        index=categories, columns=targets.columns)
+    sums['count'] = np.bincount(codes, minlength=n_categories)
+    return sums
+
+
+def merge_group_sums(left, right):
+    """Adds two results of group_sums, keeping the first-seen order of categories.
+    Target columns missing from one side, like classes it has not seen, count as zero.
+    returns dataframe
+    """
+    if left is None:
+        return right
+    index = left.index.append(right.index[~right.index.isin(left.index)])
+    columns = left.columns.append(right.columns[~right.columns.isin(left.columns)])
+    left = left.reindex(index=index, columns=columns, fill_value=0)
+    return left + right.reindex(index=index, columns=columns, fill_value=0)
+
+
+def target_sums(stats, classes=None):
+    """Gets the target sums of group_sums statistics, one column per class with classes.
+    returns np.ndarray of shape (n_categories,) or (n_categories, n_classes)
+    """
+    if classes is None:
+        return stats['sum'].values.astype(float)
+    return stats[list(range(len(classes)))].values.astype(float)
+
+
+class TargetStatistics():
+    """Accumulates the per-category target sums and counts of several columns, and the
+    target sum and row count of all rows for the prior, across chunks of rows. Fitting
+    chunk by chunk gives the same statistics as fitting on all chunks at once.
+
+    Parameters:
+        multi_class: bool
+            if True, the target holds class labels and every class seen so far gets
+            its own sum column, named by its position in the sorted classes. defaults to False.
+    """
+
+    def __init__(self, multi_class=False):
+        self.multi_class = multi_class
+        self.classes = None
+        self.columns = {}
+        self.target_sum = pd.Series(dtype=float)
+        self.target_count = 0
+
+    def update(self, X, cols, y, n_jobs=None):
+        """Adds a chunk of rows of the columns cols of X and their target y.
+        returns self
+        """
+        if self.multi_class:
+            self._merge_classes(pd.unique(pd.Series(y).dropna()))
+        targets = target_frame(y, self.classes)
+        self.target_sum = self.target_sum.add(targets.sum(), fill_value=0)
+        self.target_count += len(y)
+        merged = map_columns(lambda col: merge_group_sums(self.columns.get(col), group_sums(X[col], targets)),
+                             cols, n_jobs, stage='statistics', rows=len(X))
+        self.columns.update(zip(cols, merged))
+        return self
+
+    def _merge_classes(self, labels):
+        """Adds the class labels of a chunk, keeping classes sorted so they do not depend
+        on the chunk a class first appears in. The sum columns of the classes seen before
+        are renumbered to their new positions, with zero sums for the new classes.
+        """
+        classes = merge_categories(self.classes, labels).sort_values()
+        if self.classes is not None and not classes.equals(self.classes):
+            positions = dict(enumerate(classes.get_indexer(self.classes)))
+            sum_columns = list(range(len(classes)))
+            self.target_sum = self.target_sum.rename(positions).reindex(sum_columns, fill_value=0)
+            for col, stats in self.columns.items():
+                self.columns[col] = stats.rename(columns=positions).reindex(columns=sum_columns + ['count'],
+                                                                            fill_value=0)
+        self.classes = classes
+
+    def prior(self):
+        """Gets the target mean of all rows, or the frequency of every class with multi_class.
+        returns float or np.ndarray
+        """
+        if self.classes is None:
+            return self.target_sum['sum'] / self.target_count
+        return self.target_sum[list(range(len(self.classes)))].values / self.target_count
+
+
+def smoothed_means(sums, counts, prior, min_samples_leaf=1, smoothing=1.0):
+    """Blends the target mean of each category with the prior like category_encoders:
+    the weight of the mean grows with the count along a sigmoid centered at
+    min_samples_leaf, with smoothing setting its slope. Categories with one row or
+    none get the prior. Sums may have one column per class, with one prior per class.
+    returns np.ndarray shaped like sums
+    """
+    counts = np.asarray(counts, dtype=float)
+    if np.ndim(sums) == 2:
+        counts = counts[:, None]
+    weight = 1 / (1 + np.exp(-(counts - min_samples_leaf) / smoothing))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = prior * (1 - weight) + sums / counts * weight
+    return np.where(counts > 1, means, prior)
+
+
+def weighted_means(sums, counts, prior, prior_weight=0.0):
+    """Blends the target mean of each category with the prior as if prior_weight more
+    rows had the prior as target: (sums + prior * prior_weight) / (counts + prior_weight).
+    Categories without rows get the prior. Sums may have one column per class.
+    returns np.ndarray shaped like sums
+    """
+    counts = np.asarray(counts, dtype=float)
+    if np.ndim(sums) == 2 and counts.ndim == 1:
+        counts = counts[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = (sums + prior * prior_weight) / (counts + prior_weight)
+    return np.where(counts > 0, means, prior)
+
+
+def fold_ids(n_rows, n_folds):
+    """Assigns rows to n_folds contiguous folds of near-equal size, in row order.
+    returns fold of each row (np.ndarray)
+    """
+    return np.arange(n_rows) * n_folds // n_rows
+
+
+def category_codes(values):
+    """Factorizes values into category codes, with missing values as the last category.
+    returns (codes, number of categories)
+    """
+    codes, uniques = pd.factorize(np.asarray(values))
+    codes[codes == -1] = len(uniques)
+    return codes, len(uniques) + 1
+
+
+def out_of_fold_sums(values, y, folds, n_folds):
+    """Computes for each row the sum and count of the target over the rows of its
+    category that are in other folds. The sums of all (fold, category) pairs come
+    from one bincount per target column, so all folds cost one pass. Missing values
+    form their own category. y may have one column per class.
+    returns (sums shaped like y, counts) of each row (np.ndarray)
+    """
+    codes, n_categories = category_codes(values)
+    keys = folds * n_categories + codes
+    size = n_folds * n_categories
+    y = np.asarray(y, dtype=float)
+    targets = y.reshape(len(y), -1)
+    sums = np.stack([np.bincount(keys, weights=target, minlength=size) for target in targets.T], axis=1)
+    sums = sums.reshape(n_folds, n_categories, -1)
+    counts = np.bincount(keys, minlength=size).reshape(n_folds, n_categories)
+    row_sums = sums.sum(axis=0)[codes] - sums[folds, codes]
+    return (row_sums.reshape(y.shape),
+            counts.sum(axis=0)[codes] - counts[folds, codes])
+
+
+def category_frame(categories):
+    """Builds a small frame with one column per encoded column, listing its
+    categories in first-seen order. Fitting an encoder on this frame learns the
+    same categories as fitting on all the data they came from. Shorter columns
+    repeat their last category.
+    returns dataframe
+    """
+    n_rows = max([len(c) for c in categories.values()] + [1])
+    frame = {}
+    for col, values in categories.items():
+        values = list(values)
+        padding = values[-1:] if values else [np.nan]
+        frame[col] = values + padding * (n_rows - len(values))
+    return pd.DataFrame(frame, columns=list(categories))